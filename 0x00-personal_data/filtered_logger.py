@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 """Module for handling Personal Data
 """
-from typing import List
+from functools import lru_cache
+from typing import Callable, List, Pattern, Tuple
+import argparse
+import queue
 import re
+import sys
+import time
 import logging
+import logging.handlers
 from os import environ
 import mysql.connector
 
@@ -11,14 +17,35 @@ import mysql.connector
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
 
 
+@lru_cache(maxsize=32)
+def compile_redaction(fields: Tuple[str, ...], redaction: str,
+                      separator: str) -> Tuple[Pattern, Callable]:
+    """Compiles all fields into one alternation regex
+    Returns: the pattern and its replacement function
+    """
+    alternation = '|'.join(re.escape(fld) for fld in fields)
+    sep = re.escape(separator)
+    if len(separator) == 1:
+        value = f'[^{sep}]*'
+    else:
+        value = '.*?'
+    pattern = re.compile(f'({alternation})={value}{sep}')
+    replacements = {fld: f'{fld}={redaction}{separator}' for fld in fields}
+
+    def replace(match):
+        return replacements[match.group(1)]
+    return pattern, replace
+
+
 def filter_datum(fields: List[str], redaction: str,
                  message: str, separator: str) -> str:
-    """Filters log line
+    """Filters log line, redacting every field in a single pass
     """
-    for fld in fields:
-        msg = re.sub(f'{fld}=.*?{separator}',
-                     f'{fld}={redaction}{separator}', message)
-    return msg
+    if not fields:
+        return message
+    pattern, replace = compile_redaction(tuple(fields), redaction,
+                                         separator)
+    return pattern.sub(replace, message)
 
 
 def get_logger() -> logging.Logger:
@@ -35,6 +62,78 @@ def get_logger() -> logging.Logger:
     return logg
 
 
+class BlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler waiting for room in a bounded queue instead of
+    dropping records, and never reporting a failed record's message
+    """
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Blocks the producer until the listener catches up
+        """
+        self.queue.put(record, block=True)
+
+    def handleError(self, record: logging.LogRecord) -> None:
+        """Reports the failure without the unredacted message
+        """
+        report_error(record)
+
+
+class BlockingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a bounded queue
+    """
+
+    def enqueue_sentinel(self) -> None:
+        """Queues the end marker behind the pending records
+        """
+        self.queue.put(self._sentinel, block=True)
+
+
+class RedactingStreamHandler(logging.StreamHandler):
+    """StreamHandler never reporting a failed record's message
+    """
+
+    def handleError(self, record: logging.LogRecord) -> None:
+        """Reports the failure without the unredacted message
+        """
+        report_error(record)
+
+
+def report_error(record: logging.LogRecord) -> None:
+    """Writes on stderr that record could not be logged, naming the
+    error type only: the message and its arguments may hold PII
+    """
+    if not logging.raiseExceptions or sys.stderr is None:
+        return
+    error = sys.exc_info()[0]
+    try:
+        sys.stderr.write("--- Logging error --- {} in record of {} "
+                         "(message withheld)\n".format(
+                             getattr(error, '__name__', error),
+                             record.name))
+    except OSError:
+        pass
+
+
+def get_async_logger(
+) -> Tuple[logging.Logger, logging.handlers.QueueListener]:
+    """Returns a logging.Logger object whose records are queued and
+    redacted then written by a background listener thread. The queue is
+    bounded: producers wait for the listener rather than drop rows
+    """
+    logg = logging.getLogger("user_data")
+    logg.setLevel(logging.INFO)
+    logg.propagate = False
+
+    log_queue = queue.Queue(maxsize=100000)
+    handle_stream = RedactingStreamHandler()
+    handle_stream.setFormatter(RedactingFormatter(list(PII_FIELDS)))
+    listener = BlockingQueueListener(log_queue, handle_stream)
+    logg.handlers = [BlockingQueueHandler(log_queue)]
+    listener.start()
+
+    return logg, listener
+
+
 def get_db() -> mysql.connector.connection.MySQLConnection:
     """Creates connector to database
     """
@@ -50,22 +149,56 @@ def get_db() -> mysql.connector.connection.MySQLConnection:
     return db_conn
 
 
-def main():
-    """Logs information about user records in table
+def row_template(field_names: List[str]) -> str:
+    """Builds once the format string of an exported row
+    """
+    escaped = (f.replace('{', '{{').replace('}', '}}') for f in field_names)
+    return '; '.join(f + '={}' for f in escaped) + ';'
+
+
+def export_users(batch_size: int, report: bool = False) -> int:
+    """Streams the users table with an unbuffered cursor, fetching
+    batch_size rows at a time and logging them through a queue
+    Returns: number of exported rows
     """
     db_conn = get_db()
-    db_curs = db_conn.cursor()
+    db_curs = db_conn.cursor(buffered=False)
     db_curs.execute("SELECT * FROM users;")
-    field_names = [i[0] for i in db_curs.description]
+    template = row_template([i[0] for i in db_curs.description])
+
+    logger, listener = get_async_logger()
+    start = time.perf_counter()
+    count = 0
+    try:
+        rows = db_curs.fetchmany(batch_size)
+        while rows:
+            for line in [template.format(*row) for row in rows]:
+                logger.info(line)
+            count += len(rows)
+            rows = db_curs.fetchmany(batch_size)
+    finally:
+        listener.stop()
+        db_curs.close()
+        db_conn.close()
+
+    if report:
+        elapsed = time.perf_counter() - start
+        print(f"exported {count} rows in {elapsed:.3f}s "
+              f"({count / elapsed if elapsed else 0:.0f} rows/s)",
+              file=sys.stderr)
+    return count
 
-    logger = get_logger()
 
-    for row in db_curs:
-        str_row = ''.join(f'{f}={str(r)}; ' for r, f in zip(row, field_names))
-        logger.info(str_row.strip())
-
-    db_curs.close()
-    db_conn.close()
+def main():
+    """Logs information about user records in table
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='rows fetched per round trip')
+    parser.add_argument('--report', action='store_true',
+                        help='print export throughput on stderr')
+    args = parser.parse_args()
+    export_users(max(args.batch_size, 1), args.report)
 
 
 class RedactingFormatter(logging.Formatter):
@@ -79,11 +212,20 @@ class RedactingFormatter(logging.Formatter):
     def __init__(self, fields: List[str]):
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self._redaction = None
+        if fields:
+            self._redaction = compile_redaction(
+                tuple(fields), self.REDACTION, self.SEPARATOR)
 
     def format(self, record: logging.LogRecord) -> str:
-        """ Filters values in incoming log records using filter_datum """
-        record.msg = filter_datum(self.fields, self.REDACTION,
-                                  record.getMessage(), self.SEPARATOR)
+        """ Filters values in incoming log records with the redaction
+        pattern compiled at construction """
+        message = record.getMessage()
+        if self._redaction is not None:
+            pattern, replace = self._redaction
+            message = pattern.sub(replace, message)
+        record.msg = message
+        record.args = None
         return super(RedactingFormatter, self).format(record)
 
 
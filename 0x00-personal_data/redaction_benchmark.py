@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the single-pass redaction engine against
+the former one re.sub per PII field approach
+"""
+import re
+import timeit
+from filtered_logger import PII_FIELDS, RedactingFormatter, filter_datum
+
+
+MESSAGE = ("name=Marlene Wood;email=hwestiii@att.net;phone=(473) 401-4253;"
+           "ssn=261-72-6780;password=K5?BMNv;ip=60ed:c396:2ff:244:bbd0:"
+           "9208:26f2:93ea;last_login=2019-11-14 06:14:24;"
+           "user_agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64);")
+
+
+def per_field_sub(fields, redaction, message, separator):
+    """Former approach: one uncompiled re.sub per field
+    """
+    for fld in fields:
+        message = re.sub(f'{fld}=.*?{separator}',
+                         f'{fld}={redaction}{separator}', message)
+    return message
+
+
+def main(number: int = 100000) -> None:
+    """Times both approaches and prints the results
+    """
+    fields = list(PII_FIELDS)
+    sep = RedactingFormatter.SEPARATOR
+    red = RedactingFormatter.REDACTION
+    assert per_field_sub(fields, red, MESSAGE, sep) == \
+        filter_datum(fields, red, MESSAGE, sep)
+
+    timings = {
+        'per_field_sub': timeit.timeit(
+            lambda: per_field_sub(fields, red, MESSAGE, sep),
+            number=number),
+        'filter_datum': timeit.timeit(
+            lambda: filter_datum(fields, red, MESSAGE, sep),
+            number=number),
+    }
+    base = timings['per_field_sub']
+    for name, elapsed in timings.items():
+        print("{:<14} {:8.3f} us/msg  x{:.2f}".format(
+            name, elapsed / number * 1e6, base / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
+from typing import TypeVar, List, Iterable, Tuple
 from os import path
 import json
 import uuid
@@ -10,11 +10,14 @@ import uuid
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+INDEXED_VALUES = {}
 
 
 class Base():
     """ Base class
     """
+    _indexed_attributes: Tuple[str, ...] = ()
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
@@ -64,13 +67,17 @@ class Base():
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
         DATA[s_class] = {}
+        INDEXES[s_class] = {}
+        INDEXED_VALUES[s_class] = {}
         if not path.exists(file_path):
             return
 
         with open(file_path, 'r') as f:
             objs_json = json.load(f)
             for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+                obj = cls(**obj_json)
+                DATA[s_class][obj_id] = obj
+                cls._index_add(obj)
 
     @classmethod
     def save_to_file(cls):
@@ -90,7 +97,9 @@ class Base():
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
+        self.__class__._index_remove(self.id)
         DATA[s_class][self.id] = self
+        self.__class__._index_add(self)
         self.__class__.save_to_file()
 
     def remove(self):
@@ -99,6 +108,7 @@ class Base():
         s_class = self.__class__.__name__
         if DATA[s_class].get(self.id) is not None:
             del DATA[s_class][self.id]
+            self.__class__._index_remove(self.id)
             self.__class__.save_to_file()
 
     @classmethod
@@ -134,5 +144,63 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
+        candidates = cls._index_lookup(attributes)
+        if candidates is None:
+            candidates = DATA[s_class].values()
+        return list(filter(_search, candidates))
 
-        return list(filter(_search, DATA[s_class].values()))
+    @classmethod
+    def _index_add(cls, obj: TypeVar('Base')) -> None:
+        """ Register object in every secondary index of its class
+        """
+        if not cls._indexed_attributes:
+            return
+        s_class = cls.__name__
+        indexes = INDEXES.setdefault(s_class, {})
+        keys = {}
+        for attr in cls._indexed_attributes:
+            value = getattr(obj, attr, None)
+            try:
+                bucket = indexes.setdefault(attr, {}).setdefault(value, {})
+            except TypeError:
+                continue
+            bucket[obj.id] = obj
+            keys[attr] = value
+        INDEXED_VALUES.setdefault(s_class, {})[obj.id] = keys
+
+    @classmethod
+    def _index_remove(cls, obj_id: str) -> None:
+        """ Drop object from every secondary index of its class
+        """
+        s_class = cls.__name__
+        keys = INDEXED_VALUES.get(s_class, {}).pop(obj_id, None)
+        if keys is None:
+            return
+        indexes = INDEXES[s_class]
+        for attr, value in keys.items():
+            bucket = indexes[attr].get(value)
+            if bucket is None:
+                continue
+            bucket.pop(obj_id, None)
+            if not bucket:
+                del indexes[attr][value]
+
+    @classmethod
+    def _index_lookup(cls, attributes: dict) -> Iterable[TypeVar('Base')]:
+        """ Return candidates from the smallest matching index,
+        or None if no indexed attribute is part of the search
+        """
+        indexes = INDEXES.get(cls.__name__, {})
+        candidates = None
+        for k, v in attributes.items():
+            if k not in cls._indexed_attributes:
+                continue
+            try:
+                bucket = indexes.get(k, {}).get(v, {})
+            except TypeError:
+                continue
+            if candidates is None or len(bucket) < len(candidates):
+                candidates = bucket
+        if candidates is None:
+            return None
+        return list(candidates.values())
@@ -13,21 +13,46 @@ CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 
 auth = None
 
-if getenv('AUTH_TYPE') == 'auth':
-    from api.v1.auth.auth import Auth
-    auth = Auth()
-elif getenv('AUTH_TYPE') == 'basic_auth':
-    from api.v1.auth.basic_auth import BasicAuth
-    auth = BasicAuth()
-elif getenv('AUTH_TYPE') == 'session_auth':
-    from api.v1.auth.session_auth import SessionAuth
-    auth = SessionAuth()
-elif getenv('AUTH_TYPE') == 'session_exp_auth':
-    from api.v1.auth.session_exp_auth import SessionExpAuth
-    auth = SessionExpAuth()
-elif getenv('AUTH_TYPE') == 'session_db_auth':
-    from api.v1.auth.session_db_auth import SessionDBAuth
-    auth = SessionDBAuth()
+
+def load_auth(auth_type: str):
+    """ Returns the authenticator for one AUTH_TYPE value
+    """
+    if auth_type == 'auth':
+        from api.v1.auth.auth import Auth
+        return Auth()
+    elif auth_type == 'basic_auth':
+        from api.v1.auth.basic_auth import BasicAuth
+        return BasicAuth()
+    elif auth_type == 'session_auth':
+        from api.v1.auth.session_auth import SessionAuth
+        return SessionAuth()
+    elif auth_type == 'session_exp_auth':
+        from api.v1.auth.session_exp_auth import SessionExpAuth
+        return SessionExpAuth()
+    elif auth_type == 'session_db_auth':
+        from api.v1.auth.session_db_auth import SessionDBAuth
+        return SessionDBAuth()
+    elif auth_type == 'signed_session_auth':
+        from api.v1.auth.signed_session_auth import SignedSessionAuth
+        return SignedSessionAuth()
+    return None
+
+
+auth_types = [a.strip() for a in getenv('AUTH_TYPE', '').split(',')]
+authenticators = [a for a in map(load_auth, auth_types) if a is not None]
+if len(authenticators) == 1:
+    auth = authenticators[0]
+elif len(authenticators) > 1:
+    from api.v1.auth.auth_chain import AuthChain
+    auth = AuthChain(authenticators)
+
+if auth:
+    auth.set_excluded_paths([
+        '/api/v1/status/',
+        '/api/v1/metrics/',
+        '/api/v1/unauthorized/',
+        '/api/v1/forbidden/',
+        '/api/v1/auth_session/login/'])
 
 
 @app.errorhandler(404)
@@ -55,19 +80,12 @@ def not_allowed(error) -> str:
 def authenticate_user() -> None:
     """ Authenticates a user before processing a request.
     """
-    request_path_list = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/',
-        '/api/v1/auth_session/login/']
     if auth:
-        if auth.require_auth(request.path, request_path_list):
+        if auth.require_auth(request.path):
             if auth.authorization_header(
                     request) is None and auth.session_cookie(request) is None:
                 abort(401)
-            request.current_user = auth.current_user(request)
-            if auth.current_user(request) is None:
-                abort(403)
+            request.current_user = auth.request_user(request)
             if request.current_user is None:
                 abort(403)
 
@@ -2,36 +2,80 @@
 """ Module: creates class to manage API authentication
 """
 from flask import request
-from typing import List, TypeVar
+from functools import lru_cache
+from typing import List, TypeVar, Tuple, FrozenSet, Pattern, Optional
 from os import getenv
+from models.metrics import timed
+import re
+
+
+_UNRESOLVED = object()
+
+
+@lru_cache(maxsize=32)
+def compile_excluded_paths(
+        excluded_paths: Tuple[str, ...]
+) -> Tuple[FrozenSet[str], Optional[Pattern]]:
+    """ Compiles excluded paths into a set of exact paths, accepted with
+    or without trailing slash, and one anchored regex for the paths
+    ending with a '*' wildcard
+    """
+    exact = set()
+    prefixes = []
+    for excl in excluded_paths:
+        if excl.endswith('*'):
+            excl = excl[:-1]
+            if excl.endswith('/'):
+                prefixes.append(re.escape(excl[:-1]) + '(?:/|$)')
+            else:
+                prefixes.append(re.escape(excl))
+        else:
+            excl = excl.rstrip('/')
+            exact.add(excl)
+            exact.add(excl + '/')
+    prefix_re = re.compile('|'.join(prefixes)) if prefixes else None
+    return frozenset(exact), prefix_re
+
+
+@timed('current_user')
+def resolve_user(auth, request) -> TypeVar('User'):
+    """ Runs auth.current_user, timed as a stage of its own
+    """
+    return auth.current_user(request)
 
 
 class Auth():
     """ Class template for authentication system
     """
+    _excluded_paths = None
+
+    def set_excluded_paths(self, excluded_paths: List[str]) -> None:
+        """ Compiles once the excluded paths used by require_auth
+        """
+        self._excluded_paths = compile_excluded_paths(tuple(excluded_paths))
 
-    def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
+    @timed('require_auth')
+    def require_auth(self, path: str,
+                     excluded_paths: List[str] = None) -> bool:
         """ Function returns False if path is in excluded_path
         """
-        if path is None or excluded_paths is None or not len(excluded_paths):
+        if path is None:
             return True
+        if excluded_paths is None:
+            excluded = self._excluded_paths
+            if excluded is None:
+                return True
+        else:
+            excluded = compile_excluded_paths(tuple(excluded_paths))
 
-        if path[-1] != '/':
-            path += '/'
-        if excluded_paths[-1] != '/':
-            excluded_paths += '/'
-
-        astrcks = [strs[:-1]
-                   for strs in excluded_paths if strs[-1] == '*']
-
-        for strs in astrcks:
-            if path.startswith(strs):
-                return False
-
-        if path in excluded_paths:
+        exact, prefix_re = excluded
+        if path in exact:
+            return False
+        if prefix_re is not None and prefix_re.match(path):
             return False
         return True
 
+    @timed('authorization_header')
     def authorization_header(self, request=None) -> str:
         """ Function returns None or str accrding to request
         """
@@ -43,6 +87,19 @@ class Auth():
         """ Flask request object """
         return None
 
+    def request_user(self, request=None) -> TypeVar('User'):
+        """ Resolves current_user once per request and memoizes the
+        result on the request object
+        """
+        if request is None:
+            return None
+        usr = getattr(request, '_auth_user', _UNRESOLVED)
+        if usr is _UNRESOLVED:
+            usr = resolve_user(self, request)
+            request._auth_user = usr
+        return usr
+
+    @timed('session_cookie')
     def session_cookie(self, request=None):
         """ Returns request value of a cookie
         """
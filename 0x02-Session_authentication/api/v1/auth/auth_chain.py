@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+""" Module: chain of authenticators tried in order.
+"""
+from typing import List, TypeVar
+from api.v1.auth.auth import Auth
+
+
+class AuthChain(Auth):
+    """ Authenticates a request with the first authenticator
+    of the chain resolving a user.
+    """
+
+    def __init__(self, authenticators: List[Auth]):
+        """ Initialization with the ordered list of authenticators.
+        """
+        self.authenticators = list(authenticators)
+
+    def current_user(self, request=None) -> TypeVar('User'):
+        """ Returns the user of the first authenticator resolving one.
+        """
+        for authenticator in self.authenticators:
+            usr = authenticator.current_user(request)
+            if usr is not None:
+                return usr
+        return None
+
+    def __getattr__(self, name: str):
+        """ Delegates session management (create_session, destroy_session,
+        ...) to the first authenticator implementing it.
+        """
+        if name.startswith('_'):
+            raise AttributeError(name)
+        for authenticator in self.__dict__.get('authenticators', []):
+            if hasattr(authenticator, name):
+                return getattr(authenticator, name)
+        raise AttributeError(name)
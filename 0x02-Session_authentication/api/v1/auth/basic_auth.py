@@ -2,17 +2,38 @@
 """ Module containing class BasicAuth inheriting from Auth & implementing
 BasicAuth for REST API.
 """
-from typing import TypeVar, Tuple
+from typing import TypeVar, Tuple, Dict
 from base64 import b64decode, decode
+from collections import OrderedDict
+from os import getenv, urandom
 from api.v1.auth.auth import Auth
+from models.metrics import CACHE_REQUESTS, count
 from models.user import User
 import base64
+import hashlib
+import hmac
+import threading
+import time
 
 
 class BasicAuth(Auth):
     """ Contains BasicAuth implementation.
     """
 
+    def __init__(self):
+        """ Initialization of the verified-credential cache.
+        """
+        try:
+            self.cache_size = int(getenv('BASIC_AUTH_CACHE_SIZE', 1024))
+            self.cache_ttl = float(getenv('BASIC_AUTH_CACHE_TTL', 60))
+        except ValueError:
+            self.cache_size, self.cache_ttl = 1024, 60
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_key = urandom(32)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
     def extract_base64_authorization_header(self, auth_header: str) -> str:
         """ Function base64 part of authorization header for:
         Basic authentication.
@@ -69,6 +90,9 @@ class BasicAuth(Auth):
         header_auth = self.authorization_header(request)
         if not header_auth:
             return None
+        usr = self.cached_user(header_auth)
+        if usr is not None:
+            return usr
         base64_extract = self.extract_base64_authorization_header(header_auth)
         base64_decode = self.decode_base64_authorization_header(base64_extract)
         usr_credentials = self.extract_user_credentials(base64_decode)
@@ -76,4 +100,56 @@ class BasicAuth(Auth):
         usr_pwd = usr_credentials[1]
         user_credentials = self.user_object_from_credentials(
             usr_email, usr_pwd)
+        if user_credentials is not None:
+            self.cache_user(header_auth, user_credentials)
         return user_credentials
+
+    def _header_digest(self, auth_header: str) -> bytes:
+        """ Keyed hash of the raw authorization header, so the cache
+        never holds credentials in clear.
+        """
+        return hmac.new(self._cache_key, auth_header.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def cached_user(self, auth_header: str) -> TypeVar('User'):
+        """ Returns the user previously verified for auth_header, or None
+        if unknown, expired, removed or if its password changed.
+        """
+        if self.cache_size <= 0:
+            return None
+        digest = self._header_digest(auth_header)
+        with self._cache_lock:
+            entry = self._cache.get(digest)
+            if entry is not None:
+                usr_id, pwd_hash, expires_at = entry
+                usr = User.get(usr_id)
+                if usr is not None and usr.password == pwd_hash \
+                        and expires_at > time.monotonic():
+                    self._cache.move_to_end(digest)
+                    self.cache_hits += 1
+                    count(CACHE_REQUESTS, 'basic_auth', 'hit')
+                    return usr
+                del self._cache[digest]
+            self.cache_misses += 1
+        count(CACHE_REQUESTS, 'basic_auth', 'miss')
+        return None
+
+    def cache_user(self, auth_header: str, usr: TypeVar('User')) -> None:
+        """ Remembers usr as verified for auth_header.
+        """
+        if self.cache_size <= 0:
+            return
+        digest = self._header_digest(auth_header)
+        entry = (usr.id, usr.password, time.monotonic() + self.cache_ttl)
+        with self._cache_lock:
+            self._cache[digest] = entry
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """ Returns the credential cache counters.
+        """
+        with self._cache_lock:
+            return {'hits': self.cache_hits, 'misses': self.cache_misses,
+                    'size': len(self._cache)}
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 """ Session Authentication.
 """
-from typing import Dict
+from datetime import datetime
+from typing import Optional
 from flask.globals import session
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import SessionStore, session_store_from_env
 from models.user import User
 import uuid
 
@@ -11,7 +13,21 @@ import uuid
 class SessionAuth(Auth):
     """ Session class inherits auth.
     """
-    user_id_by_session_id: Dict[str, str] = {}
+    _session_store: SessionStore = None
+
+    @property
+    def session_store(self) -> SessionStore:
+        """ Store shared by every session auth instance of the process,
+        selected by SESSION_STORE on first use.
+        """
+        if SessionAuth._session_store is None:
+            SessionAuth._session_store = session_store_from_env()
+        return SessionAuth._session_store
+
+    def session_ttl(self) -> Optional[float]:
+        """ Lifetime of new sessions in the store, None for no expiry.
+        """
+        return None
 
     def create_session(self, user_id: str = None) -> str:
         """ Generator: session id.
@@ -19,7 +35,9 @@ class SessionAuth(Auth):
         if user_id is None or not isinstance(user_id, str):
             return None
         sess_id = str(uuid.uuid4())
-        self.user_id_by_session_id[sess_id] = user_id
+        self.session_store.set(
+            sess_id, {'user_id': user_id, 'created_at': datetime.now()},
+            self.session_ttl())
         return sess_id
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
@@ -27,7 +45,10 @@ class SessionAuth(Auth):
         """
         if session_id is None or not isinstance(session_id, str):
             return None
-        return self.user_id_by_session_id.get(session_id, None)
+        sess_dict = self.session_store.get(session_id)
+        if sess_dict is None:
+            return None
+        return sess_dict['user_id']
 
     def current_user(self, request=None):
         """ Returns user based cookie value.
@@ -45,5 +66,4 @@ class SessionAuth(Auth):
             return False
         if not self.user_id_for_session_id(cookie_info):
             return False
-        del self.user_id_by_session_id[cookie_info]
-        return True
+        return self.session_store.delete(cookie_info)
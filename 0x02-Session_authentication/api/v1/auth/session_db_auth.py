@@ -17,14 +17,25 @@ class SessionDBAuth(SessionExpAuth):
             return None
         usr_sess = UserSession(user_id=user_id, session_id=sess_id)
         usr_sess.save()
+        self.schedule_expiry(sess_id, usr_sess.created_at)
         return sess_id
 
+    def schedule_new_session(self, session_id):
+        """ Nothing: create_session schedules the session once, from the
+        created_at of its UserSession that expire_session checks
+        """
+
     def user_id_for_session_id(self, session_id=None):
-        """ Returns user_id from session_id
+        """ Returns user_id from session_id, from the session store
+        when it is shared by every worker, else from UserSession
         """
         if session_id is None:
             return None
-        UserSession.load_from_file()
+        if self.session_store.shared:
+            usr_id = super().user_id_for_session_id(session_id)
+            if usr_id is not None:
+                return usr_id
+        UserSession.sync_from_file()
         is_usr_valid = UserSession.search({'session_id': session_id})
         if not is_usr_valid:
             return None
@@ -43,13 +54,43 @@ class SessionDBAuth(SessionExpAuth):
             return False
         if not self.user_id_for_session_id(cookie_info):
             return False
+        self.session_store.delete(cookie_info)
         usr_sess = UserSession.search({'session_id': cookie_info})
         if not usr_sess:
             return False
         usr_sess = usr_sess[0]
         try:
             usr_sess.remove()
-            UserSession.save_to_file()
         except Exception:
             return False
         return True
+
+    def schedule_existing_sessions(self):
+        """ Registers the stored sessions in the expiry index, loading
+        every UserSession: only called when the reaper thread runs
+        """
+        super().schedule_existing_sessions()
+        UserSession.sync_from_file()
+        for usr_sess in UserSession.all():
+            self.schedule_expiry(usr_sess.session_id, usr_sess.created_at)
+
+    def expiry_batch(self):
+        """ Groups the UserSession removals of a batch of expirations
+        in one log write
+        """
+        return UserSession.batch()
+
+    def expire_session(self, session_id):
+        """ Evicts session_id from memory and from the store if expired
+        """
+        super().expire_session(session_id)
+        UserSession.sync_from_file()
+        usr_sess = UserSession.search({'session_id': session_id})
+        if not usr_sess:
+            return False
+        usr_sess = usr_sess[0]
+        delta_tme = timedelta(seconds=self.session_duration)
+        if (usr_sess.created_at + delta_tme) >= datetime.now():
+            return False
+        usr_sess.remove()
+        return True
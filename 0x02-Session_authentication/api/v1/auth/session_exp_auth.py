@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 """ Class: session expiration.
 """
+from contextlib import nullcontext
 from os import getenv
 from datetime import datetime, timedelta, timedelta
 from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_reaper import SessionReaper
 
 
 class SessionExpAuth(SessionAuth):
@@ -18,6 +20,23 @@ class SessionExpAuth(SessionAuth):
         except Exception:
             sess_duration = 0
         self.session_duration = sess_duration
+        try:
+            reap_interval = float(getenv('SESSION_REAP_INTERVAL', 0))
+            reap_batch = int(getenv('SESSION_REAP_BATCH', 1000))
+        except ValueError:
+            reap_interval, reap_batch = 0, 1000
+        self.reaper = SessionReaper(self, reap_interval, reap_batch)
+        if self.session_duration > 0:
+            self.reaper.start()
+            if self.reaper.running:
+                self.schedule_existing_sessions()
+
+    def session_ttl(self):
+        """ Sessions expire from the store after session_duration.
+        """
+        if self.session_duration > 0:
+            return self.session_duration
+        return None
 
     def create_session(self, user_id=None):
         """ Generator of session id.
@@ -25,18 +44,22 @@ class SessionExpAuth(SessionAuth):
         sess_id = super().create_session(user_id)
         if sess_id is None:
             return None
-        sess_dict = {'user_id': user_id, 'created_at': datetime.now()}
-        SessionAuth.user_id_by_session_id[sess_id] = sess_dict
+        self.schedule_new_session(sess_id)
         return sess_id
 
+    def schedule_new_session(self, session_id: str):
+        """ Registers a session created now in the expiry index.
+        """
+        self.schedule_expiry(session_id, datetime.now())
+
     def user_id_for_session_id(self, session_id=None):
         """ Returns user_id for session_id.
         """
         if session_id is None:
             return None
-        if session_id not in SessionAuth.user_id_by_session_id.keys():
+        sess_dict = self.session_store.get(session_id)
+        if sess_dict is None:
             return None
-        sess_dict = SessionAuth.user_id_by_session_id[session_id]
         if self.session_duration <= 0:
             return sess_dict["user_id"]
         if "created_at" not in sess_dict.keys():
@@ -46,3 +69,30 @@ class SessionExpAuth(SessionAuth):
         if (tme_create + delta_time) < datetime.now():
             return None
         return sess_dict["user_id"]
+
+    def schedule_expiry(self, session_id: str, created_at: datetime):
+        """ Registers a session in the expiry index of the reaper, when
+        its thread runs: nothing else would ever drain the index.
+        """
+        if self.session_duration <= 0 or not self.reaper.running:
+            return
+        delta_time = timedelta(seconds=self.session_duration)
+        self.reaper.schedule(session_id, created_at + delta_time)
+
+    def schedule_existing_sessions(self):
+        """ Registers the sessions created before the reaper existed.
+        """
+        for sess_id, sess_dict in self.session_store.items():
+            self.schedule_expiry(sess_id, sess_dict["created_at"])
+
+    def expiry_batch(self):
+        """ Context of a batch of expire_session calls.
+        """
+        return nullcontext()
+
+    def expire_session(self, session_id: str) -> bool:
+        """ Evicts session_id if it has expired.
+        """
+        if SessionExpAuth.user_id_for_session_id(self, session_id):
+            return False
+        return self.session_store.delete(session_id)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+""" Module: background eviction of expired sessions.
+"""
+from datetime import datetime
+from typing import Dict
+import heapq
+import logging
+import threading
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SessionReaper():
+    """ Time-ordered expiry index with an optional background thread
+    evicting expired sessions in batches.
+    """
+
+    def __init__(self, auth, interval: float = 0, batch_size: int = 1000):
+        """ Initialization of the reaper for a session auth instance.
+        """
+        self.auth = auth
+        self.interval = interval
+        self.batch_size = batch_size
+        self.reaped = 0
+        self.runs = 0
+        self.failures = 0
+        self._heap = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def schedule(self, session_id: str, expires_at: datetime) -> None:
+        """ Registers the expiry time of a session.
+        """
+        with self._lock:
+            heapq.heappush(self._heap, (expires_at, session_id))
+
+    def reap(self, now: datetime = None) -> int:
+        """ Evicts at most batch_size sessions expired before now.
+        Sessions whose eviction raised go back to the index, to be
+        retried on a later run.
+        Returns the number of sessions evicted.
+        """
+        if now is None:
+            now = datetime.now()
+        due = []
+        with self._lock:
+            while self._heap and len(due) < self.batch_size \
+                    and self._heap[0][0] < now:
+                due.append(heapq.heappop(self._heap))
+        count = 0
+        failed = []
+        error = None
+        try:
+            with self.auth.expiry_batch():
+                for i, (expires_at, session_id) in enumerate(due):
+                    try:
+                        if self.auth.expire_session(session_id):
+                            count += 1
+                    except Exception as e:
+                        failed.append(due[i])
+                        error = e
+        except Exception:
+            # the batch could not be committed: retry all of it
+            LOGGER.exception("session reaper: batch of %d failed", len(due))
+            failed = due
+            count = 0
+        else:
+            if failed:
+                LOGGER.warning("session reaper: %d of %d evictions failed",
+                               len(failed), len(due), exc_info=error)
+        with self._lock:
+            for entry in failed:
+                heapq.heappush(self._heap, entry)
+            self.reaped += count
+            self.failures += len(failed)
+            self.runs += 1
+        return count
+
+    def start(self) -> None:
+        """ Starts the background thread if an interval is configured.
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="session-reaper")
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        """ Whether the background thread runs.
+        """
+        return self._thread is not None
+
+    def stop(self) -> None:
+        """ Stops the background thread and drops the expiry index.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._heap = []
+
+    def _run(self) -> None:
+        """ Reaps until stopped, draining full batches back to back.
+        """
+        while not self._stop.wait(self.interval):
+            try:
+                failures = self.failures
+                self.reap()
+                # drain full batches, but wait an interval after failures
+                while self.failures == failures and self.has_due():
+                    self.reap()
+            except Exception:
+                LOGGER.exception("session reaper: run failed")
+
+    def has_due(self, now: datetime = None) -> bool:
+        """ Tells whether the earliest scheduled session has expired.
+        """
+        if now is None:
+            now = datetime.now()
+        with self._lock:
+            return bool(self._heap) and self._heap[0][0] < now
+
+    def stats(self) -> Dict[str, int]:
+        """ Returns the reaper counters.
+        """
+        with self._lock:
+            return {'reaped': self.reaped, 'runs': self.runs,
+                    'failures': self.failures,
+                    'scheduled': len(self._heap)}
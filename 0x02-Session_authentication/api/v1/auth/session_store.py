@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+""" Module: session store backends used by the session auth classes.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from os import O_CREAT, O_RDWR, fdopen, getenv, open as os_open, path
+from typing import Dict, Iterator, Optional, Tuple
+import fcntl
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import socket
+import struct
+import threading
+import time
+from models.metrics import STORE_OPERATIONS, count
+
+
+class SessionStore(ABC):
+    """ Maps a session id to {'user_id': str, 'created_at': datetime},
+    entries set with a ttl (seconds) disappear once it has elapsed.
+    """
+    shared = False
+    metrics_name = 'session'
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[dict]:
+        """ Returns the session of session_id, None if unknown or expired.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, session_id: str, session: dict,
+            ttl: Optional[float] = None) -> None:
+        """ Stores session under session_id.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """ Removes session_id, returns True if it was stored.
+        """
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """ Iterates over the stored sessions, when the backend can.
+        """
+        return iter(())
+
+
+class MemorySessionStore(SessionStore):
+    """ Sessions in a dict of the current process.
+    """
+    metrics_name = 'session_memory'
+
+    def __init__(self):
+        """ Initialization of an empty store.
+        """
+        self._sessions: Dict[str, dict] = {}
+        self._expiry: Dict[str, float] = {}
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """ Returns the session of session_id, None if unknown or expired.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'read')
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        expires_at = self._expiry.get(session_id)
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return session
+
+    def set(self, session_id: str, session: dict,
+            ttl: Optional[float] = None) -> None:
+        """ Stores session under session_id.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'write')
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = session
+            if ttl is None:
+                self._expiry.pop(session_id, None)
+            else:
+                self._expiry[session_id] = now + ttl
+                heapq.heappush(self._expiry_heap, (now + ttl, session_id))
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """ Drops the entries whose ttl elapsed, oldest first, the lock
+        being held.
+        """
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, session_id = heapq.heappop(heap)
+            if self._expiry.get(session_id) == expires_at:
+                del self._expiry[session_id]
+                self._sessions.pop(session_id, None)
+
+    def delete(self, session_id: str) -> bool:
+        """ Removes session_id, returns True if it was stored.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'delete')
+        with self._lock:
+            self._expiry.pop(session_id, None)
+            return self._sessions.pop(session_id, None) is not None
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """ Iterates over the stored sessions.
+        """
+        return iter(list(self._sessions.items()))
+
+
+class MmapSessionStore(SessionStore):
+    """ Sessions in an open-addressing hash table of fixed-width slots
+    inside a memory-mapped file, shared by every process of the host.
+    Writers take an exclusive flock, readers a shared one.
+    Removals shift the rest of the cluster back instead of leaving
+    tombstones, and writers clear the expired entries on their probe
+    sequence, so probe lengths only depend on the live sessions.
+    DELETED is only found in tables written by former versions.
+    """
+    shared = True
+    metrics_name = 'session_mmap'
+    MAGIC = b"SESSMAP1"
+    HEADER = struct.Struct("<8sQ")
+    SLOT = struct.Struct("<B7x64s64sdd")
+    EMPTY, USED, DELETED = 0, 1, 2
+
+    def __init__(self, file_path: str, capacity: int = 65536):
+        """ Opens file_path, creating a table of capacity slots if needed.
+        """
+        size = self.HEADER.size + capacity * self.SLOT.size
+        fd = os_open(file_path, O_RDWR | O_CREAT, 0o600)
+        self._fd = fdopen(fd, 'r+b')
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if path.getsize(file_path) < self.HEADER.size:
+                self._fd.truncate(size)
+                self._fd.seek(0)
+                self._fd.write(self.HEADER.pack(self.MAGIC, capacity))
+                self._fd.flush()
+            self._map = mmap.mmap(self._fd.fileno(), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        magic, self.capacity = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC:
+            raise ValueError("{} is not a session store".format(file_path))
+
+    def _offset(self, slot: int) -> int:
+        """ Byte offset of slot in the mapping.
+        """
+        return self.HEADER.size + slot * self.SLOT.size
+
+    def _home(self, key: bytes) -> int:
+        """ First slot of the linear probing sequence of key.
+        """
+        return int.from_bytes(hashlib.blake2b(
+            key, digest_size=8).digest(), 'little') % self.capacity
+
+    def _record(self, slot: int) -> tuple:
+        """ Unpacked record of slot.
+        """
+        return self.SLOT.unpack_from(self._map, self._offset(slot))
+
+    def _find(self, key: bytes) -> Tuple[Optional[int], Optional[tuple]]:
+        """ Returns the slot holding key and its record, or (None, None).
+        """
+        slot = self._home(key)
+        for _ in range(self.capacity):
+            record = self._record(slot)
+            if record[0] == self.EMPTY:
+                break
+            if record[0] == self.USED and record[1].rstrip(b"\0") == key:
+                return slot, record
+            slot = (slot + 1) % self.capacity
+        return None, None
+
+    def _remove(self, slot: int) -> None:
+        """ Empties slot by backward-shift deletion: each following
+        entry of the cluster that may live in the hole moves into it,
+        so no probe sequence crosses an empty slot. Exclusive lock held.
+        """
+        capacity = self.capacity
+        hole = slot
+        following = slot
+        for _ in range(capacity - 1):
+            following = (following + 1) % capacity
+            record = self._record(following)
+            if record[0] == self.EMPTY:
+                break
+            if record[0] != self.USED:
+                continue
+            home = self._home(record[1].rstrip(b"\0"))
+            # the entry may move back unless its home lies in (hole, it]
+            if (following - home) % capacity >= (following - hole) % capacity:
+                start = self._offset(following)
+                self._map[self._offset(hole):self._offset(hole + 1)] = \
+                    self._map[start:start + self.SLOT.size]
+                hole = following
+        self._map[self._offset(hole):self._offset(hole + 1)] = \
+            bytes(self.SLOT.size)
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """ Returns the session of session_id, None if unknown or expired.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'read')
+        key = session_id.encode()
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+        try:
+            slot, record = self._find(key)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if record is None:
+            return None
+        _, _, user_id, created_at, expires_at = record
+        if expires_at and expires_at < time.time():
+            return None
+        return {'user_id': user_id.rstrip(b"\0").decode(),
+                'created_at': datetime.fromtimestamp(created_at)}
+
+    def set(self, session_id: str, session: dict,
+            ttl: Optional[float] = None) -> None:
+        """ Stores session under session_id.
+        Raises: ValueError when the table is full.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'write')
+        key = session_id.encode()
+        data = self.SLOT.pack(self.USED, key, session['user_id'].encode(),
+                              session['created_at'].timestamp(),
+                              time.time() + ttl if ttl else 0.0)
+        now = time.time()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            free = None
+            slot = self._home(key)
+            steps = 0
+            while steps < self.capacity:
+                record = self._record(slot)
+                if record[0] == self.EMPTY:
+                    free = slot
+                    break
+                if record[0] != self.USED or (record[4] and
+                                              record[4] < now):
+                    # tombstone or expired: the cluster shifts into it
+                    self._remove(slot)
+                    continue
+                if record[1].rstrip(b"\0") == key:
+                    free = slot
+                    break
+                slot = (slot + 1) % self.capacity
+                steps += 1
+            if free is None:
+                raise ValueError("session store is full")
+            self._map[self._offset(free):self._offset(free + 1)] = data
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def delete(self, session_id: str) -> bool:
+        """ Removes session_id, returns True if it was stored.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'delete')
+        key = session_id.encode()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            slot, record = self._find(key)
+            if slot is None:
+                return False
+            self._remove(slot)
+            return True
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """ Iterates over the stored sessions.
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+        try:
+            records = [self.SLOT.unpack_from(self._map, self._offset(slot))
+                       for slot in range(self.capacity)]
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        for state, key, user_id, created_at, _ in records:
+            if state == self.USED:
+                yield key.rstrip(b"\0").decode(), {
+                    'user_id': user_id.rstrip(b"\0").decode(),
+                    'created_at': datetime.fromtimestamp(created_at)}
+
+
+class RedisSessionStore(SessionStore):
+    """ Sessions in a key-value server speaking the Redis protocol
+    (SET with EX, GET, DEL), shared by every node. A local stand-in
+    server lives in api/v1/auth/session_store_server.py.
+    """
+    shared = True
+    metrics_name = 'session_redis'
+
+    def __init__(self, host: str = 'localhost', port: int = 6379,
+                 prefix: str = 'session:', timeout: float = 5):
+        """ Initialization, connections are opened per thread on use.
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        """ Returns the buffered socket file of the calling thread.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection(self.address, self.timeout)
+            conn = sock.makefile('rwb')
+            self._local.conn = conn
+        return conn
+
+    def command(self, *args):
+        """ Sends one command and returns its decoded reply.
+        """
+        payload = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode()
+            payload.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        conn = self._connection()
+        try:
+            conn.write(b"".join(payload))
+            conn.flush()
+            return self._read_reply(conn)
+        except OSError:
+            self._local.conn = None
+            raise
+
+    def _read_reply(self, conn):
+        """ Parses one RESP reply.
+        """
+        line = conn.readline()
+        if not line:
+            raise ConnectionError("session store closed the connection")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return conn.read(length + 2)[:-2]
+        if kind == b"*":
+            return [self._read_reply(conn) for _ in range(int(body))]
+        raise RuntimeError("unexpected reply {!r}".format(line))
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """ Returns the session of session_id, None if unknown or expired.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'read')
+        value = self.command("GET", self.prefix + session_id)
+        if value is None:
+            return None
+        session = json.loads(value)
+        session['created_at'] = datetime.fromtimestamp(
+            session['created_at'])
+        return session
+
+    def set(self, session_id: str, session: dict,
+            ttl: Optional[float] = None) -> None:
+        """ Stores session under session_id.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'write')
+        value = json.dumps({'user_id': session['user_id'],
+                            'created_at': session['created_at'].timestamp()})
+        if ttl:
+            self.command("SET", self.prefix + session_id, value,
+                         "EX", max(1, math.ceil(ttl)))
+        else:
+            self.command("SET", self.prefix + session_id, value)
+
+    def delete(self, session_id: str) -> bool:
+        """ Removes session_id, returns True if it was stored.
+        """
+        count(STORE_OPERATIONS, self.metrics_name, 'delete')
+        return self.command("DEL", self.prefix + session_id) > 0
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """ Iterates over the stored sessions, SCANning the prefix.
+        """
+        cursor = b"0"
+        while True:
+            cursor, keys = self.command("SCAN", cursor, "MATCH",
+                                        self.prefix + "*", "COUNT", 1000)
+            for key in keys:
+                session_id = key.decode()[len(self.prefix):]
+                session = self.get(session_id)
+                if session is not None:
+                    yield session_id, session
+            if cursor == b"0":
+                return
+
+
+def session_store_from_env(keyspace: str = 'session') -> SessionStore:
+    """ Builds the store selected by SESSION_STORE:
+      - memory (default): this process only
+      - mmap: SESSION_STORE_PATH file shared by the processes of a host,
+        sized by SESSION_STORE_CAPACITY
+      - redis: server at SESSION_STORE_URL (host:port), shared by nodes
+    Other keyspaces than 'session' get a store of their own (a
+    <path>_<keyspace> file, a <keyspace>: prefix), so their entries are
+    never iterated as sessions.
+    """
+    kind = getenv('SESSION_STORE', 'memory')
+    if kind == 'mmap':
+        file_path = getenv('SESSION_STORE_PATH', '.db_sessions.mmap')
+        if keyspace != 'session':
+            root, ext = path.splitext(file_path)
+            file_path = "{}_{}{}".format(root, keyspace, ext)
+        return MmapSessionStore(
+            file_path, int(getenv('SESSION_STORE_CAPACITY', 65536)))
+    if kind == 'redis':
+        host, _, port = getenv('SESSION_STORE_URL',
+                               'localhost:6379').rpartition(':')
+        return RedisSessionStore(host or 'localhost', int(port),
+                                 keyspace + ':')
+    return MemorySessionStore()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+""" Module: local stand-in for the networked session store, speaking
+the subset of the Redis protocol used by RedisSessionStore.
+Run with: python3 -m api.v1.auth.session_store_server [port]
+"""
+from fnmatch import fnmatchcase
+from typing import Dict, Optional, Tuple
+import socketserver
+import sys
+import threading
+import time
+
+
+class SessionStoreHandler(socketserver.StreamRequestHandler):
+    """ Serves GET, SET (with EX/PX), DEL, SCAN, PING and FLUSHALL.
+    """
+
+    def handle(self):
+        """ Answers commands until the client disconnects.
+        """
+        while True:
+            try:
+                args = self._read_command()
+            except (ValueError, ConnectionError):
+                return
+            if args is None:
+                return
+            self.wfile.write(self.server.execute(args))
+            self.wfile.flush()
+
+    def _read_command(self):
+        """ Reads one RESP array of bulk strings.
+        """
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if line[:1] != b"*":
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class SessionStoreServer(socketserver.ThreadingTCPServer):
+    """ In-memory key-value server with lazy TTL expiry.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int]):
+        """ Initialization of an empty server bound to address.
+        """
+        super().__init__(address, SessionStoreHandler)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+
+    def execute(self, args) -> bytes:
+        """ Runs one command, returns its RESP reply.
+        """
+        name = args[0].upper() if args else b""
+        with self.lock:
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"FLUSHALL":
+                self.data.clear()
+                return b"+OK\r\n"
+            if name == b"SET" and len(args) >= 3:
+                expires_at = None
+                if len(args) == 5 and args[3].upper() == b"EX":
+                    expires_at = time.time() + int(args[4])
+                elif len(args) == 5 and args[3].upper() == b"PX":
+                    expires_at = time.time() + int(args[4]) / 1000
+                self.data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if name == b"GET" and len(args) == 2:
+                value = self._get(args[1])
+                if value is None:
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if name == b"DEL":
+                count = 0
+                for key in args[1:]:
+                    if self._get(key) is not None:
+                        del self.data[key]
+                        count += 1
+                return b":%d\r\n" % count
+            if name == b"SCAN" and len(args) >= 2:
+                return self._scan(args)
+        return b"-ERR unknown command\r\n"
+
+    def _scan(self, args) -> bytes:
+        """ SCAN cursor [MATCH pattern] [COUNT count], the cursor being
+        the position in the sorted keys.
+        """
+        options = dict(zip((arg.upper() for arg in args[2::2]),
+                           args[3::2]))
+        pattern = options.get(b"MATCH", b"*").decode()
+        start = int(args[1])
+        keys = sorted(self.data)
+        end = min(start + int(options.get(b"COUNT", 10)), len(keys))
+        found = [key for key in keys[start:end]
+                 if fnmatchcase(key.decode(), pattern)
+                 and self._get(key) is not None]
+        cursor = str(end if end < len(keys) else 0).encode()
+        reply = [b"*2\r\n$%d\r\n%s\r\n" % (len(cursor), cursor),
+                 b"*%d\r\n" % len(found)]
+        reply += [b"$%d\r\n%s\r\n" % (len(key), key) for key in found]
+        return b"".join(reply)
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        """ Returns the live value of key, dropping it if expired.
+        """
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            del self.data[key]
+            return None
+        return value
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 6379
+    with SessionStoreServer(("127.0.0.1", port)) as server:
+        server.serve_forever()
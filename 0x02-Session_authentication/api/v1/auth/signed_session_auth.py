@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+""" Stateless signed session tokens.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from os import getenv, getpid
+from typing import Dict, Optional, Set, Tuple
+from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_store import SessionStore, session_store_from_env
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _b64encode(data: bytes) -> str:
+    """ Unpadded urlsafe base64.
+    """
+    return urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    """ Decodes unpadded urlsafe base64.
+    """
+    return urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class SignedSessionAuth(SessionAuth):
+    """ Session cookie is an HMAC-signed token
+    kid.user_id.issued_at.nonce.signature
+    validated without storage I/O. Logged out tokens are denied until
+    they would have expired anyway: their nonces go to a 'revoked'
+    keyspace of the session store, mirrored in an in-process denylist,
+    so only tokens found in the denylist cost a store lookup. A thread
+    polls the generation entry bumped by every logout each
+    REVOCATION_REFRESH seconds and reloads the denylist when it moved:
+    with a shared store, a logout on another process is seen within
+    that delay.
+    """
+    DEFAULT_DURATION = 86400
+    DEFAULT_REFRESH = 1.0
+    GENERATION = '.generation'
+    _revocation_store: SessionStore = None
+
+    def __init__(self):
+        """ Initialization: keys from SESSION_SIGNING_KEYS as
+        'kid:secret,kid:secret', the first one signs and all verify,
+        so keys can be rotated. Lifetime from SESSION_DURATION.
+        """
+        self.signing_keys = self._load_keys(getenv('SESSION_SIGNING_KEYS'))
+        self.signing_kid = next(iter(self.signing_keys))
+        try:
+            sess_duration = int(getenv('SESSION_DURATION'))
+        except Exception:
+            sess_duration = 0
+        if sess_duration <= 0:
+            sess_duration = self.DEFAULT_DURATION
+        self.session_duration = sess_duration
+        try:
+            self.revocation_refresh = float(getenv('REVOCATION_REFRESH'))
+        except Exception:
+            self.revocation_refresh = self.DEFAULT_REFRESH
+        self._denylist: Set[str] = set()
+        self._denylist_lock = threading.Lock()
+        self._refresh_pid = None
+
+    @property
+    def revocation_store(self) -> SessionStore:
+        """ Store of the revoked nonces, apart from the sessions so that
+        neither items() nor the reaper ever see them.
+        """
+        if SignedSessionAuth._revocation_store is None:
+            SignedSessionAuth._revocation_store = session_store_from_env(
+                'revoked')
+        return SignedSessionAuth._revocation_store
+
+    def denylist(self) -> Set[str]:
+        """ Nonces revoked as of the last refresh, starting the refresh
+        thread of this process on first use.
+        """
+        if self._refresh_pid != getpid():
+            with self._denylist_lock:
+                if self._refresh_pid != getpid():
+                    self._refresh_pid = getpid()
+                    threading.Thread(target=self._refresh, daemon=True,
+                                     name="revocation-refresh").start()
+        return self._denylist
+
+    def _generation(self) -> Optional[str]:
+        """ Current value of the generation entry of the revocation store.
+        """
+        entry = self.revocation_store.get(self.GENERATION)
+        return entry and entry['user_id']
+
+    def _refresh(self) -> None:
+        """ Reloads the denylist whenever the generation moved, which
+        nonces never match: the '.' is not in their alphabet.
+        """
+        seen = object()
+        while True:
+            try:
+                generation = self._generation()
+                if generation != seen:
+                    with self._denylist_lock:
+                        self._denylist = {
+                            nonce for nonce, _
+                            in self.revocation_store.items()
+                            if nonce != self.GENERATION}
+                    seen = generation
+            except Exception:
+                LOGGER.exception("revocation refresh failed")
+            time.sleep(self.revocation_refresh)
+
+    @staticmethod
+    def _load_keys(spec: Optional[str]) -> Dict[str, bytes]:
+        """ Parses the key ring, a random per-process key if none is set.
+        """
+        keys = {}
+        for item in (spec or '').split(','):
+            kid, sep, secret = item.strip().partition(':')
+            if sep and kid and secret and '.' not in kid:
+                keys[kid] = secret.encode()
+        if not keys:
+            keys['local'] = secrets.token_bytes(32)
+        return keys
+
+    def _sign(self, kid: str, payload: str) -> str:
+        """ Signature of payload with key kid.
+        """
+        return _b64encode(hmac.new(self.signing_keys[kid], payload.encode(),
+                                   hashlib.sha256).digest())
+
+    def create_session(self, user_id: str = None) -> str:
+        """ Returns a signed token for user_id.
+        """
+        if user_id is None or not isinstance(user_id, str):
+            return None
+        payload = "{}.{}.{}.{}".format(self.signing_kid,
+                                       _b64encode(user_id.encode()),
+                                       int(time.time()),
+                                       secrets.token_urlsafe(12))
+        return "{}.{}".format(payload, self._sign(self.signing_kid, payload))
+
+    def verify_token(self, token: str) -> Optional[Tuple[str, int, str]]:
+        """ Returns (user_id, issued_at, nonce) of a well-signed,
+        unexpired token, None otherwise.
+        """
+        if token is None or not isinstance(token, str):
+            return None
+        parts = token.split('.')
+        if len(parts) != 5 or parts[0] not in self.signing_keys:
+            return None
+        kid, user_id, issued_at, nonce, signature = parts
+        payload = token[:-len(signature) - 1]
+        if not hmac.compare_digest(self._sign(kid, payload), signature):
+            return None
+        try:
+            issued_at = int(issued_at)
+            user_id = _b64decode(user_id).decode()
+        except ValueError:
+            return None
+        if issued_at + self.session_duration < time.time():
+            return None
+        return user_id, issued_at, nonce
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """ Returns the user_id of a valid, not revoked token.
+        """
+        claims = self.verify_token(session_id)
+        if claims is None:
+            return None
+        user_id, _, nonce = claims
+        if nonce in self.denylist() and \
+                self.revocation_store.get(nonce) is not None:
+            return None
+        return user_id
+
+    def destroy_session(self, request=None):
+        """ Revokes the token of the request cookie until it expires.
+        """
+        claims = self.verify_token(self.session_cookie(request))
+        if claims is None:
+            return False
+        user_id, issued_at, nonce = claims
+        remaining = issued_at + self.session_duration - time.time()
+        self.revocation_store.set(nonce,
+                                  {'user_id': user_id,
+                                   'created_at': datetime.now()},
+                                  max(remaining, 1))
+        with self._denylist_lock:
+            self._denylist.add(nonce)
+        self.revocation_store.set(self.GENERATION,
+                                  {'user_id': secrets.token_hex(8),
+                                   'created_at': datetime.now()})
+        return True
@@ -2,18 +2,125 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from flask import Response, abort, jsonify, request
+from os import getenv
+from typing import Iterable, Iterator, List, Tuple
+from urllib.parse import urlencode
+from models.base import json_dumps
 from models.user import User
+import binascii
+
+
+STREAM_CHUNK_SIZE = 500
+MAX_PAGE_SIZE = 1000
+try:
+    PAGE_SIZE = min(MAX_PAGE_SIZE, max(1, int(getenv('USERS_PAGE_SIZE',
+                                                     100))))
+except ValueError:
+    PAGE_SIZE = 100
+
+
+def stream_json_array(fragments: Iterable[bytes]) -> Iterator[bytes]:
+    """ Yields a JSON array of encoded fragments,
+    STREAM_CHUNK_SIZE fragments per chunk
+    """
+    yield b"["
+    chunk = []
+    first = True
+    for fragment in fragments:
+        chunk.append(fragment)
+        if len(chunk) == STREAM_CHUNK_SIZE:
+            yield (b"" if first else b",") + b",".join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + b",".join(chunk)
+    yield b"]\n"
+
+
+def encode_cursor(key: Tuple[int, str]) -> str:
+    """ Opaque cursor of an order key
+    """
+    return urlsafe_b64encode("{}:{}".format(*key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """ Order key of a cursor
+    Raises: ValueError if the cursor is malformed
+    """
+    try:
+        created_at, obj_id = urlsafe_b64decode(
+            cursor.encode()).decode().split(':', 1)
+        return (int(created_at), obj_id)
+    except (TypeError, UnicodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+
+def project(obj_json: dict, fields: List[str]) -> dict:
+    """ Keeps only fields of obj_json
+    """
+    return {f: obj_json[f] for f in fields}
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (all optional):
+      - limit: page size, USERS_PAGE_SIZE by default, MAX_PAGE_SIZE at most
+      - cursor: from the Link header (rel="next") of the previous page
+      - email: only the user with this email
+      - name: only users with this first or last name
+      - fields: comma separated attributes to return
     Return:
-      - list of all User objects JSON represented
+      - page of User objects JSON represented, ordered by creation,
+        streamed; a Link header points to the next page if any
+      - 400 if a parameter is invalid
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    args = request.args
+    try:
+        limit = int(args.get('limit', PAGE_SIZE))
+        after = None
+        if args.get('cursor'):
+            after = decode_cursor(args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': "Invalid limit or cursor"}), 400
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return jsonify({'error': "Invalid limit or cursor"}), 400
+    fields = None
+    if args.get('fields'):
+        fields = args.get('fields').split(',')
+        public = [f for f in User._json_fields() if f[0] != '_']
+        unknown = [f for f in fields if f not in public]
+        if unknown:
+            return jsonify({'error': "Unknown field: {}".format(
+                unknown[0])}), 400
+
+    candidates = None
+    if args.get('email') is not None:
+        candidates = User.search({'email': args.get('email')})
+    if args.get('name') is not None:
+        named = User.search_name(args.get('name'))
+        if candidates is not None:
+            ids = {user.id for user in named}
+            named = [user for user in candidates if user.id in ids]
+        candidates = named
+
+    users = User.page(after, limit + 1, candidates)
+    headers = {}
+    if len(users) > limit:
+        users = users[:limit]
+        query = args.to_dict()
+        query['cursor'] = encode_cursor(users[-1].order_key())
+        headers['Link'] = '<{}?{}>; rel="next"'.format(
+            request.base_url, urlencode(query))
+    if fields is None:
+        fragments = (user.to_json_bytes() for user in users)
+    else:
+        fragments = (json_dumps(project(user.to_json(), fields))
+                     for user in users)
+    return Response(stream_json_array(fragments), headers=headers,
+                    mimetype='application/json')
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -28,14 +135,17 @@ def view_one_user(user_id: str = None) -> str:
     if user_id is None:
         abort(404)
     if user_id == 'me':
-        if request.current_user is None:
+        from api.v1.app import auth
+        me = auth.request_user(request) if auth else None
+        if me is None:
             abort(404)
         else:
-            return jsonify(request.current_user.to_json())
+            return Response(me.to_json_bytes() + b"\n",
+                            mimetype='application/json')
     usr = User.get(user_id)
     if usr is None:
         abort(404)
-    return jsonify(usr.to_json())
+    return Response(usr.to_json_bytes() + b"\n", mimetype='application/json')
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
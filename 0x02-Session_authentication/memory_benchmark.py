@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" Memory benchmark: bytes per User/UserSession held in DATA, compared
+with plain __dict__ instances holding two datetimes (former layout)
+"""
+from datetime import datetime
+import sys
+import tracemalloc
+import uuid
+from models.user import User
+from models.user_session import UserSession
+
+
+class LegacyObject():
+    """ Former layout: __dict__ with datetime timestamps
+    """
+
+    def __init__(self, **kwargs):
+        """ Initialize from kwargs
+        """
+        self.id = str(uuid.uuid4())
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+def bytes_per_object(factory, count: int) -> float:
+    """ Average allocation of factory() over count instances,
+    ids included
+    """
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    objs = [factory(i) for i in range(count)]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in end.compare_to(start, 'filename'))
+    del objs
+    return size / count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    user_fields = {'email': 'bob@hbtn.io', '_password': 'x' * 64,
+                   'first_name': 'Bob', 'last_name': 'Dylan'}
+    session_fields = {'user_id': 'u', 'session_id': 's'}
+    rows = [
+        ("User", lambda i: LegacyObject(**user_fields),
+         lambda i: User(**user_fields)),
+        ("UserSession", lambda i: LegacyObject(**session_fields),
+         lambda i: UserSession(**session_fields)),
+    ]
+    for name, before, after in rows:
+        b = bytes_per_object(before, count)
+        a = bytes_per_object(after, count)
+        print("{:<12} before={:6.0f} B/obj after={:6.0f} B/obj "
+              "saved={:4.0%}".format(name, b, a, 1 - a / b))
@@ -1,29 +1,111 @@
 #!/usr/bin/env python3
 """ Base module
 """
-from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Callable, TypeVar, List, Iterable, Optional, Tuple
+from os import getenv, path, replace, stat
+from models.locks import ReadWriteLock
+from models.metrics import STORE_OPERATIONS, count, timed
+from models.snapshot import BinarySnapshot, JsonSnapshot
+import fcntl
+import heapq
 import json
 import uuid
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+INDEXED_VALUES = {}
+LOG_SIZES = {}
+FILE_STATES = {}
+ORDERS = {}
+SNAPSHOTS = {}
+SHADOWED = {}
+LOCKS = {}
+BATCHES = {}
+FILE_LOCKS = {}
+LOG_MIN_COMPACT = 1000
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value: datetime) -> int:
+    """ Naive UTC datetime to integer epoch seconds
+    """
+    return (value - EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch(value: int) -> datetime:
+    """ Integer epoch seconds to naive UTC datetime
+    """
+    return EPOCH + timedelta(seconds=value)
+
+
+def json_dumps(value) -> bytes:
+    """ Compact JSON with sorted keys (the layout of Flask's jsonify),
+    encoded by orjson when installed unless JSON_ENCODER=json
+    """
+    if orjson is not None and getenv('JSON_ENCODER', 'orjson') == 'orjson':
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(value, separators=(',', ':'),
+                      sort_keys=True).encode()
+
+
+def reading(method: Callable) -> Callable:
+    """ Runs a lookup classmethod holding the lock of its class shared,
+    or exclusive while a mapped snapshot may have objects to build
+    """
+    @wraps(method)
+    def wrapper(cls, *args, **kwargs):
+        lock = cls._lock()
+        lock.acquire_read()
+        try:
+            if cls.__name__ not in SNAPSHOTS:
+                return method(cls, *args, **kwargs)
+        finally:
+            lock.release_read()
+        with lock.write:
+            return method(cls, *args, **kwargs)
+    return wrapper
+
+
+def writing(method: Callable) -> Callable:
+    """ Runs a method changing the objects of its class, or of the class
+    of its instance, holding the lock of that class exclusive
+    """
+    @wraps(method)
+    def wrapper(owner, *args, **kwargs):
+        klass = owner if isinstance(owner, type) else type(owner)
+        with klass._lock().write:
+            return method(owner, *args, **kwargs)
+    return wrapper
 
 
 class Base():
     """ Base class
+    Instances use __slots__ and keep timestamps as integer epoch seconds,
+    subclasses list their own attributes in __slots__ too.
+    The objects of a class are guarded by a ReadWriteLock: lookups hold
+    it shared (@reading), changes and file loads exclusive (@writing).
     """
+    __slots__ = ('id', '_created_at', '_updated_at', '_json_cache')
+    _indexed_attributes: Tuple[str, ...] = ()
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
-        if DATA.get(s_class) is None:
-            DATA[s_class] = {}
+        DATA.setdefault(s_class, {})
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
+        self._json_cache = None
         if kwargs.get('created_at') is not None:
             self.created_at = datetime.strptime(kwargs.get('created_at'),
                                                 TIMESTAMP_FORMAT)
@@ -35,6 +117,48 @@ class Base():
         else:
             self.updated_at = datetime.utcnow()
 
+    @property
+    def created_at(self) -> datetime:
+        """ Creation time
+        """
+        return from_epoch(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        """ Stores creation time as epoch seconds
+        """
+        self._created_at = to_epoch(value)
+
+    @property
+    def updated_at(self) -> datetime:
+        """ Last update time
+        """
+        return from_epoch(self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value: datetime):
+        """ Stores last update time as epoch seconds
+        """
+        self._updated_at = to_epoch(value)
+
+    @classmethod
+    def _json_fields(cls) -> Tuple[str, ...]:
+        """ Attributes serialized by to_json, in declaration order
+        """
+        fields = cls.__dict__.get('_json_fields_cache')
+        if fields is None:
+            fields = ['id', 'created_at', 'updated_at']
+            for klass in reversed(cls.__mro__[:-1]):
+                if klass is Base:
+                    continue
+                slots = klass.__dict__.get('__slots__', ())
+                if isinstance(slots, str):
+                    slots = (slots,)
+                fields.extend(slot for slot in slots if slot not in fields)
+            fields = tuple(fields)
+            cls._json_fields_cache = fields
+        return fields
+
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
         """
@@ -48,65 +172,433 @@ class Base():
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        for key in self._json_fields():
             if not for_serialization and key[0] == '_':
                 continue
+            value = getattr(self, key, None)
             if type(value) is datetime:
                 result[key] = value.strftime(TIMESTAMP_FORMAT)
             else:
                 result[key] = value
         return result
 
+    def order_key(self) -> Tuple[int, str]:
+        """ Position of the object in the (created_at, id) ordering
+        """
+        return (self._created_at, self.id)
+
+    def to_json_bytes(self) -> bytes:
+        """ to_json() encoded, cached until the next save
+        """
+        fragment = self._json_cache
+        if fragment is None:
+            fragment = json_dumps(self.to_json())
+            self._json_cache = fragment
+        return fragment
+
+    @classmethod
+    def _lock(cls) -> ReadWriteLock:
+        """ Lock guarding the objects of the class
+        """
+        lock = LOCKS.get(cls.__name__)
+        if lock is None:
+            lock = LOCKS.setdefault(cls.__name__, ReadWriteLock())
+        return lock
+
     @classmethod
+    @timed('load_from_file', sampled=False)
+    @writing
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from snapshot file, then replay the log.
+        The snapshot is only memory-mapped when it is binary
+        (STORE_FORMAT=binary) or with STORE_LOADING=lazy: its objects
+        are then built on first access (see _materialize)
+        """
+        with cls._file_lock():
+            cls._load_files()
+
+    @classmethod
+    def _load_files(cls):
+        """ Body of load_from_file, the files being locked
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
+        file_path = cls._snapshot_path()
         DATA[s_class] = {}
-        if not path.exists(file_path):
+        INDEXES[s_class] = {}
+        INDEXED_VALUES[s_class] = {}
+        LOG_SIZES[s_class] = 0
+        SNAPSHOTS.pop(s_class, None)
+        SHADOWED[s_class] = set()
+        snapshot = cls._snapshot_signature()
+        if path.exists(file_path):
+            count(STORE_OPERATIONS, 'file_snapshot', 'read')
+            reader = None
+            if file_path.endswith(".bin"):
+                reader = BinarySnapshot.open(file_path)
+            elif getenv('STORE_LOADING', 'eager') == 'lazy':
+                reader = JsonSnapshot.open(file_path)
+            if reader is not None:
+                SNAPSHOTS[s_class] = reader
+            elif not file_path.endswith(".bin"):
+                with open(file_path, 'r') as f:
+                    objs_json = json.load(f)
+                    for obj_id, obj_json in objs_json.items():
+                        obj = cls(**obj_json)
+                        DATA[s_class][obj_id] = obj
+                        cls._index_add(obj)
+        ORDERS[s_class] = sorted(obj.order_key()
+                                 for obj in DATA[s_class].values())
+        FILE_STATES[s_class] = {'snapshot': snapshot,
+                                'log_offset': cls._replay_log(0)}
+
+    @classmethod
+    def _snapshot_path(cls, for_write: bool = False) -> str:
+        """ Snapshot file of the format selected by STORE_FORMAT, reading
+        the JSON one until a binary snapshot has been written
+        """
+        json_path = ".db_{}.json".format(cls.__name__)
+        if getenv('STORE_FORMAT', 'json') != 'binary':
+            return json_path
+        bin_path = ".db_{}.bin".format(cls.__name__)
+        if for_write or path.exists(bin_path) or not path.exists(json_path):
+            return bin_path
+        return json_path
+
+    @classmethod
+    def _materialize(cls, obj_id: str,
+                     obj_json: dict = None) -> TypeVar('Base'):
+        """ Builds the object obj_id from the mapped snapshot, unless
+        DATA already holds its current version
+        Return: the object, None if it is not in the snapshot
+        """
+        s_class = cls.__name__
+        reader = SNAPSHOTS.get(s_class)
+        shadowed = SHADOWED[s_class]
+        if reader is None or obj_id in shadowed:
+            return DATA[s_class].get(obj_id)
+        if obj_json is None:
+            obj_json = reader.get(obj_id)
+            if obj_json is None:
+                return None
+        obj = cls(**obj_json)
+        shadowed.add(obj_id)
+        DATA[s_class][obj_id] = obj
+        cls._index_add(obj)
+        cls._order_add(obj)
+        return obj
+
+    @classmethod
+    def _materialize_all(cls) -> None:
+        """ Builds every object still in the mapped snapshot, before
+        scans and snapshots, then unmaps it
+        """
+        s_class = cls.__name__
+        reader = SNAPSHOTS.get(s_class)
+        if reader is None:
             return
+        shadowed = SHADOWED[s_class]
+        objs = DATA[s_class]
+        for obj_id, obj_json in reader.items():
+            if obj_id in shadowed:
+                continue
+            obj = cls(**obj_json)
+            objs[obj_id] = obj
+            cls._index_add(obj)
+        del SNAPSHOTS[s_class]
+        reader.close()
+        shadowed.clear()
+        ORDERS[s_class] = sorted(obj.order_key() for obj in objs.values())
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def _shadow(cls, obj_id: str) -> None:
+        """ Marks the snapshot version of obj_id as outdated
+        """
+        s_class = cls.__name__
+        reader = SNAPSHOTS.get(s_class)
+        shadowed = SHADOWED.setdefault(s_class, set())
+        if reader is not None and obj_id not in shadowed \
+                and obj_id in reader:
+            shadowed.add(obj_id)
+
+    @classmethod
+    def sync_from_file(cls):
+        """ Bring DATA up to date with changes written by other processes:
+        nothing is read when the files are unchanged, only the new log
+        records are replayed when the log grew, and a full reload happens
+        when the snapshot was rewritten
+        """
+        if not cls._files_changed():
+            return
+        with cls._lock().write:
+            cls._flush_batch()
+            with cls._file_lock():
+                cls._catch_up()
+
+    @classmethod
+    def _catch_up(cls):
+        """ Applies what other processes wrote since the last load or
+        sync, the files being locked
+        """
+        state = FILE_STATES.get(cls.__name__)
+        if state is None or state['snapshot'] != cls._snapshot_signature():
+            cls._load_files()
+            return
+        log_size = cls._log_size()
+        if log_size == state['log_offset']:
+            return
+        if log_size < state['log_offset']:
+            cls._load_files()
+            return
+        state['log_offset'] = cls._replay_log(state['log_offset'])
+
+    @classmethod
+    @contextmanager
+    def _file_lock(cls, exclusive: bool = False):
+        """ flock of .db_<Class>.lock shared by the processes using the
+        files: shared to read them or append to the log, exclusive to
+        rewrite the snapshot and truncate the log. Reentrant within
+        the process, whose holder has the class write lock
+        """
+        s_class = cls.__name__
+        held = FILE_LOCKS.get(s_class)
+        if held is not None:
+            if exclusive and not held[1]:
+                raise RuntimeError("cannot compact while reading the files")
+            held[2] += 1
+            try:
+                yield
+            finally:
+                held[2] -= 1
+            return
+        fd = open(".db_{}.lock".format(s_class), 'a')
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            FILE_LOCKS[s_class] = [fd, exclusive, 1]
+            try:
+                yield
+            finally:
+                del FILE_LOCKS[s_class]
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            fd.close()
 
     @classmethod
+    def _files_changed(cls) -> bool:
+        """ Whether the files moved past what DATA reflects, checked
+        without the lock: a stale answer only costs a locked check
+        """
+        state = FILE_STATES.get(cls.__name__)
+        if state is None or state['snapshot'] != cls._snapshot_signature():
+            return True
+        return cls._log_size() != state['log_offset']
+
+    @classmethod
+    def _log_size(cls) -> int:
+        """ Size of the log file, 0 if there is none
+        """
+        try:
+            return stat(".db_{}.log".format(cls.__name__)).st_size
+        except OSError:
+            return 0
+
+    @classmethod
+    def _snapshot_signature(cls) -> Tuple[int, int, int]:
+        """ Identity of the snapshot file as (inode, mtime, size)
+        """
+        try:
+            st = stat(cls._snapshot_path())
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def _replay_log(cls, offset: int) -> int:
+        """ Apply the log records found after offset on top of DATA
+        Return: offset just past the last complete record
+        """
+        s_class = cls.__name__
+        log_path = ".db_{}.log".format(s_class)
+        if not path.exists(log_path):
+            return 0
+
+        count(STORE_OPERATIONS, 'file_log', 'read')
+        with open(log_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # torn write at the tail of the log
+                    break
+                record = json.loads(line)
+                obj_id = record.get('id')
+                cls._index_remove(obj_id)
+                cls._shadow(obj_id)
+                old = DATA[s_class].pop(obj_id, None)
+                if old is not None:
+                    cls._order_remove(old)
+                if record.get('op') == 'save':
+                    obj = cls(**record.get('obj'))
+                    DATA[s_class][obj_id] = obj
+                    cls._index_add(obj)
+                    cls._order_add(obj)
+                LOG_SIZES[s_class] = LOG_SIZES.get(s_class, 0) + 1
+                offset += len(line)
+        return offset
+
+    @classmethod
+    @timed('save_to_file', sampled=False)
+    @writing
     def save_to_file(cls):
-        """ Save all objects to file
+        """ Save all objects to a snapshot file and truncate the log.
+        The snapshot, a JSON object with one member per line or a
+        BinarySnapshot with STORE_FORMAT=binary, is written aside then
+        renamed over the previous one, which stays intact for the
+        processes that have it mapped. The files stay locked exclusive
+        from the replay of the records other processes appended to the
+        truncation of the log, so none of them is lost
+        """
+        cls._flush_batch()
+        with cls._file_lock(exclusive=True):
+            cls._catch_up()
+            cls._save_files()
+
+    @classmethod
+    def _save_files(cls):
+        """ Body of save_to_file, the files being locked exclusive
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
+        file_path = cls._snapshot_path(for_write=True)
+        cls._materialize_all()
         objs_json = {}
         for obj_id, obj in DATA[s_class].items():
             objs_json[obj_id] = obj.to_json(True)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+        count(STORE_OPERATIONS, 'file_snapshot', 'write')
+        if file_path.endswith(".bin"):
+            BinarySnapshot.write(file_path, cls._json_fields(),
+                                 cls._indexed_attributes, objs_json.values())
+        else:
+            with open(file_path + ".tmp", 'w') as f:
+                f.write("{\n")
+                f.write(",\n".join(
+                    "{}: {}".format(json.dumps(obj_id), json.dumps(obj_json))
+                    for obj_id, obj_json in objs_json.items()))
+                f.write("\n}\n" if objs_json else "}\n")
+            replace(file_path + ".tmp", file_path)
+        open(".db_{}.log".format(s_class), 'w').close()
+        LOG_SIZES[s_class] = 0
+        FILE_STATES[s_class] = {'snapshot': cls._snapshot_signature(),
+                                'log_offset': 0}
+
+    @classmethod
+    @writing
+    def append_to_log(cls, record: dict):
+        """ Append one change record to the log, or to the pending
+        records of the current batch
+        """
+        line = json_dumps(record) + b"\n"
+        pending = BATCHES.get(cls.__name__)
+        if pending is not None:
+            pending.append(line)
+        else:
+            cls._write_log([line])
+
+    @classmethod
+    def _write_log(cls, lines: List[bytes]) -> None:
+        """ Append lines to the log in a single write, compacting the log
+        into a new snapshot once it outgrows the live objects
+        """
+        s_class = cls.__name__
+        data = b"".join(lines)
+        count(STORE_OPERATIONS, 'file_log', 'write')
+        with cls._file_lock():
+            with open(".db_{}.log".format(s_class), 'ab',
+                      buffering=0) as f:
+                f.write(data)
+                # O_APPEND wrote at the end, wherever other processes
+                # left it: our records end at the new position
+                start = f.tell() - len(data)
+            state = FILE_STATES.get(s_class)
+            if state is not None and state['log_offset'] == start:
+                # nobody else wrote since the last sync: skip our records
+                state['log_offset'] = start + len(data)
+        LOG_SIZES[s_class] = LOG_SIZES.get(s_class, 0) + len(lines)
+        if LOG_SIZES[s_class] > max(LOG_MIN_COMPACT, cls.count()):
+            cls.save_to_file()
+
+    @classmethod
+    @contextmanager
+    def batch(cls):
+        """ Groups the saves and removals made in the block: the class
+        stays locked for writing, and their log records are appended in
+        one write when the block exits (or when another process changed
+        the files, before replaying them)
+        """
+        s_class = cls.__name__
+        with cls._lock().write:
+            if s_class in BATCHES:
+                yield
+                return
+            BATCHES[s_class] = []
+            try:
+                yield
+            finally:
+                cls._flush_batch()
+                del BATCHES[s_class]
 
+    @classmethod
+    def _flush_batch(cls) -> None:
+        """ Writes the records pending in the current batch
+        """
+        pending = BATCHES.get(cls.__name__)
+        if pending:
+            lines = pending[:]
+            del pending[:]
+            cls._write_log(lines)
+
+    @writing
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
+        self._json_cache = None
+        self.__class__._index_remove(self.id)
+        self.__class__._shadow(self.id)
+        old = DATA[s_class].get(self.id)
+        if old is not self:
+            if old is not None:
+                self.__class__._order_remove(old)
+            self.__class__._order_add(self)
         DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self.__class__._index_add(self)
+        self.__class__.append_to_log({'op': 'save', 'id': self.id,
+                                      'obj': self.to_json(True)})
 
+    @writing
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        stored = DATA[s_class].get(self.id)
+        if stored is None and s_class in SNAPSHOTS:
+            # reloaded since self was read: its copy is still mapped
+            stored = self.__class__._materialize(self.id)
+        if stored is not None:
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            self.__class__._index_remove(self.id)
+            self.__class__._order_remove(stored)
+            self.__class__.append_to_log({'op': 'remove', 'id': self.id})
 
     @classmethod
+    @reading
     def count(cls) -> int:
         """ Count all objects
         """
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        reader = SNAPSHOTS.get(s_class)
+        if reader is None:
+            return len(DATA[s_class])
+        return len(DATA[s_class]) + len(reader) - len(SHADOWED[s_class])
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -115,13 +607,19 @@ class Base():
         return cls.search()
 
     @classmethod
+    @reading
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
         s_class = cls.__name__
-        return DATA[s_class].get(id)
+        obj = DATA[s_class].get(id)
+        if obj is None and s_class in SNAPSHOTS:
+            obj = cls._materialize(id)
+        return obj
 
     @classmethod
+    @timed('search')
+    @reading
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
         """
@@ -134,4 +632,121 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        return list(filter(_search, DATA[s_class].values()))
+        candidates = cls._index_lookup(attributes)
+        if candidates is None:
+            cls._materialize_all()
+            candidates = DATA[s_class].values()
+        return list(filter(_search, candidates))
+
+    @classmethod
+    @reading
+    def page(cls, after: Optional[Tuple[int, str]] = None, limit: int = 100,
+             candidates: Optional[Iterable[TypeVar('Base')]] = None
+             ) -> List[TypeVar('Base')]:
+        """ At most limit objects ordered by (created_at, id) and strictly
+        after the order key after. Walks the ordering from the cursor,
+        or picks the first ones of candidates when given (e.g. the result
+        of an indexed search)
+        """
+        s_class = cls.__name__
+        if candidates is not None:
+            keyed = ((obj.order_key(), obj) for obj in candidates)
+            if after is not None:
+                keyed = (item for item in keyed if item[0] > after)
+            return [obj for _, obj in heapq.nsmallest(
+                limit, keyed, key=lambda item: item[0])]
+        cls._materialize_all()
+        order = ORDERS.get(s_class, [])
+        start = 0 if after is None else bisect_right(order, after)
+        objs = DATA[s_class]
+        return [objs[obj_id] for _, obj_id in order[start:start + limit]]
+
+    @classmethod
+    def _order_add(cls, obj: TypeVar('Base')) -> None:
+        """ Insert object in the (created_at, id) ordering of its class
+        """
+        insort(ORDERS.setdefault(cls.__name__, []), obj.order_key())
+
+    @classmethod
+    def _order_remove(cls, obj: TypeVar('Base')) -> None:
+        """ Drop object from the (created_at, id) ordering of its class
+        """
+        order = ORDERS.get(cls.__name__, [])
+        key = obj.order_key()
+        i = bisect_left(order, key)
+        if i < len(order) and order[i] == key:
+            del order[i]
+
+    @classmethod
+    def _index_add(cls, obj: TypeVar('Base')) -> None:
+        """ Register object in every secondary index of its class
+        """
+        if not cls._indexed_attributes:
+            return
+        s_class = cls.__name__
+        indexes = INDEXES.setdefault(s_class, {})
+        keys = {}
+        for attr in cls._indexed_attributes:
+            value = getattr(obj, attr, None)
+            try:
+                bucket = indexes.setdefault(attr, {}).setdefault(value, {})
+            except TypeError:
+                continue
+            bucket[obj.id] = obj
+            keys[attr] = value
+        INDEXED_VALUES.setdefault(s_class, {})[obj.id] = keys
+
+    @classmethod
+    def _index_remove(cls, obj_id: str) -> None:
+        """ Drop object from every secondary index of its class
+        """
+        s_class = cls.__name__
+        keys = INDEXED_VALUES.get(s_class, {}).pop(obj_id, None)
+        if keys is None:
+            return
+        indexes = INDEXES[s_class]
+        for attr, value in keys.items():
+            bucket = indexes[attr].get(value)
+            if bucket is None:
+                continue
+            bucket.pop(obj_id, None)
+            if not bucket:
+                del indexes[attr][value]
+
+    @classmethod
+    def _materialize_matches(cls, attributes: dict) -> None:
+        """ Builds the objects of the mapped snapshot that an indexed
+        lookup on attributes can return: through the snapshot index of
+        one of them, or all of them when it has none
+        """
+        reader = SNAPSHOTS.get(cls.__name__)
+        if reader is None:
+            return
+        for k, v in attributes.items():
+            if k in cls._indexed_attributes and k in reader.indexed \
+                    and type(v) is str:
+                for obj_id, obj_json in reader.lookup(k, v):
+                    cls._materialize(obj_id, obj_json)
+                return
+        cls._materialize_all()
+
+    @classmethod
+    def _index_lookup(cls, attributes: dict) -> Iterable[TypeVar('Base')]:
+        """ Return candidates from the smallest matching index,
+        or None if no indexed attribute is part of the search
+        """
+        cls._materialize_matches(attributes)
+        indexes = INDEXES.get(cls.__name__, {})
+        candidates = None
+        for k, v in attributes.items():
+            if k not in cls._indexed_attributes:
+                continue
+            try:
+                bucket = indexes.get(k, {}).get(v, {})
+            except TypeError:
+                continue
+            if candidates is None or len(bucket) < len(candidates):
+                candidates = bucket
+        if candidates is None:
+            return None
+        return list(candidates.values())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+""" Locks module: reader-writer lock guarding the in-memory store of a
+model class against the threads of a threaded server
+"""
+from threading import Condition, Lock, get_ident, local
+
+
+class _Hold():
+    """ Context manager taking one side of a ReadWriteLock
+    """
+    __slots__ = ('_acquire', '_release')
+
+    def __init__(self, acquire, release):
+        """ Initialization from the acquire/release pair of a side
+        """
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self) -> None:
+        """ Takes the lock
+        """
+        self._acquire()
+
+    def __exit__(self, *exc_info) -> None:
+        """ Gives it back
+        """
+        self._release()
+
+
+class ReadWriteLock():
+    """ Any number of readers or a single writer, waiting writers going
+    first. Reentrant: a reader may read again, the writer may read or
+    write again; a reader asking to write raises RuntimeError since two
+    such readers would wait for each other forever.
+      with lock.read: ...
+      with lock.write: ...
+    or through the acquire_/release_ methods of each side.
+    """
+
+    def __init__(self):
+        """ Initialization of a free lock
+        """
+        self._mutex = Lock()
+        self._cond = Condition(self._mutex)
+        self._readers = 0
+        self._writer = None
+        self._depth = 0
+        self._waiting = 0
+        self._parked = 0
+        self._local = local()
+        self.read = _Hold(self.acquire_read, self.release_read)
+        self.write = _Hold(self.acquire_write, self.release_write)
+
+    def acquire_read(self) -> None:
+        """ Takes the lock shared
+        """
+        if self._writer == get_ident():
+            self._depth += 1
+            return
+        held = self._local
+        reads = getattr(held, 'reads', 0)
+        if reads:
+            held.reads = reads + 1
+            return
+        self._mutex.acquire()
+        if self._writer is not None or self._waiting:
+            self._parked += 1
+            while self._writer is not None or self._waiting:
+                self._cond.wait()
+            self._parked -= 1
+        self._readers += 1
+        self._mutex.release()
+        held.reads = 1
+
+    def release_read(self) -> None:
+        """ Gives back a shared hold
+        """
+        if self._writer == get_ident():
+            self._depth -= 1
+            return
+        held = self._local
+        held.reads -= 1
+        if held.reads:
+            return
+        self._mutex.acquire()
+        self._readers -= 1
+        if not self._readers and self._waiting:
+            self._cond.notify_all()
+        self._mutex.release()
+
+    def acquire_write(self) -> None:
+        """ Takes the lock exclusive
+        """
+        me = get_ident()
+        if self._writer == me:
+            self._depth += 1
+            return
+        if getattr(self._local, 'reads', 0):
+            raise RuntimeError("cannot write while holding the read lock")
+        with self._cond:
+            self._waiting += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._writer = me
+            self._depth = 1
+
+    def release_write(self) -> None:
+        """ Gives back an exclusive hold
+        """
+        self._depth -= 1
+        if self._depth:
+            return
+        with self._cond:
+            self._writer = None
+            if self._waiting or self._parked:
+                self._cond.notify_all()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+""" Metrics module: in-process counters and latency histograms shared by
+the models and the API, exposed in the Prometheus text format
+"""
+from bisect import bisect_left
+from functools import wraps
+from os import getenv
+from random import random
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+import threading
+
+
+ENABLED = getenv('METRICS_ENABLED', '1') != '0'
+try:
+    SAMPLE_RATE = min(1.0, max(0.0, float(getenv('METRICS_SAMPLE_RATE',
+                                                 0.1))))
+except ValueError:
+    SAMPLE_RATE = 0.1
+LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3,
+                   0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...],
+            extra: str = '') -> str:
+    """ Prometheus label set of names=values
+    """
+    pairs = ['{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                              .replace('"', '\\"').replace('\n', '\\n'))
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter():
+    """ Monotonic counters, one per label values
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...]):
+        """ Initialization of an empty family
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        """ Adds amount to the counter of labelvalues
+        """
+        with self._lock:
+            self._values[labelvalues] = \
+                self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> List[str]:
+        """ Exposition lines of the family
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = ["# HELP {} {}".format(self.name, self.help),
+                 "# TYPE {} counter".format(self.name)]
+        for labelvalues, value in values:
+            lines.append("{}{} {}".format(
+                self.name, _labels(self.labelnames, labelvalues), value))
+        return lines
+
+
+class Gauge(Counter):
+    """ Values that are set rather than incremented
+    """
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        """ Sets the gauge of labelvalues
+        """
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def collect(self) -> List[str]:
+        """ Exposition lines of the family
+        """
+        lines = super().collect()
+        lines[1] = "# TYPE {} gauge".format(self.name)
+        return lines
+
+
+class Histogram():
+    """ Bucketed observations, one histogram per label values
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """ Initialization of an empty family
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """ Records value in the histogram of labelvalues
+        """
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0]
+                self._series[labelvalues] = series
+            series[0][i] += 1
+            series[1] += value
+
+    def collect(self) -> List[str]:
+        """ Exposition lines of the family, with cumulative buckets
+        """
+        with self._lock:
+            series = sorted((labelvalues, list(counts), total)
+                            for labelvalues, (counts, total)
+                            in self._series.items())
+        lines = ["# HELP {} {}".format(self.name, self.help),
+                 "# TYPE {} histogram".format(self.name)]
+        bounds = [repr(b) for b in self.buckets] + ['+Inf']
+        for labelvalues, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    self.name, _labels(self.labelnames, labelvalues,
+                                       'le="{}"'.format(bound)),
+                    cumulative))
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append("{}_sum{} {}".format(self.name, labels, total))
+            lines.append("{}_count{} {}".format(self.name, labels,
+                                                cumulative))
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    'app_stage_seconds',
+    'Latency of the authentication and storage stages, sampled',
+    ('stage',))
+STAGE_SAMPLE_RATE = Gauge(
+    'app_stage_sample_rate',
+    'Fraction of the calls of a stage recorded in app_stage_seconds',
+    ('stage',))
+CACHE_REQUESTS = Counter(
+    'app_cache_requests_total', 'Cache lookups by result',
+    ('cache', 'result'))
+STORE_OPERATIONS = Counter(
+    'app_store_operations_total', 'Reads and writes of the storage layers',
+    ('store', 'op'))
+REGISTRY = [STAGE_SECONDS, STAGE_SAMPLE_RATE, CACHE_REQUESTS,
+            STORE_OPERATIONS]
+
+
+def timed(stage: str, sampled: bool = True) -> Callable:
+    """ Decorator recording the latency of func in STAGE_SECONDS.
+    Per-request stages are sampled at METRICS_SAMPLE_RATE so the clock
+    reads and the histogram lock stay off most calls; rare stages
+    (sampled=False) are always recorded. With METRICS_ENABLED=0 func is
+    returned undecorated.
+    """
+    rate = SAMPLE_RATE if sampled else 1.0
+
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        STAGE_SAMPLE_RATE.set(stage, value=rate)
+        observe = STAGE_SECONDS.observe
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if rate < 1.0 and random() >= rate:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(perf_counter() - start, stage)
+        return wrapper
+    return decorator
+
+
+def count(family: Counter, *labelvalues: str) -> None:
+    """ Increments a counter unless metrics are disabled
+    """
+    if ENABLED:
+        family.inc(*labelvalues)
+
+
+def render() -> str:
+    """ All metrics in the Prometheus text exposition format
+    """
+    lines = []
+    for family in REGISTRY:
+        lines.extend(family.collect())
+    return "\n".join(lines) + "\n"
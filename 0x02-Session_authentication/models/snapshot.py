@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+""" Snapshot module: memory-mapped readers of the snapshot files, used by
+Base to serve objects without decoding a whole file
+"""
+from abc import ABC, abstractmethod
+from array import array
+from os import replace, stat
+from typing import Iterable, Iterator, List, Optional, Tuple
+import json
+import mmap
+import struct
+import zlib
+
+
+class Snapshot(ABC):
+    """ Read-only view of the objects of a snapshot file, as the dicts
+    given to the model constructor
+    """
+    indexed: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """ Number of objects
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def __contains__(self, obj_id: str) -> bool:
+        """ Whether obj_id is in the snapshot
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, obj_id: str) -> Optional[dict]:
+        """ Object obj_id, None if absent
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def lookup(self, attr: str, value: str) -> List[Tuple[str, dict]]:
+        """ (id, object) of the objects whose attr is value, attr being
+        one of indexed
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """ Iterates over (id, object)
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """ Unmaps the file
+        """
+        self._map.close()
+
+
+def map_file(file_path: str) -> Optional[mmap.mmap]:
+    """ Read-only mapping of file_path, None if it is empty
+    """
+    with open(file_path, 'rb') as f:
+        if stat(file_path).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class JsonSnapshot(Snapshot):
+    """ .db_<Class>.json written by Base.save_to_file: a JSON object with
+    one member per line. JSON strings never hold a raw newline, so the
+    byte span of every object is found without decoding them.
+    """
+
+    def __init__(self, file_map: mmap.mmap, spans: dict):
+        """ Initialization from the mapping and the span of each object
+        """
+        self._map = file_map
+        self._spans = spans
+
+    @classmethod
+    def open(cls, file_path: str) -> Optional['JsonSnapshot']:
+        """ Maps file_path and scans it
+        Return: None if the file is not in that layout
+        """
+        file_map = map_file(file_path)
+        if file_map is None or file_map[:2] != b"{\n":
+            return None
+        spans = {}
+        pos = 2
+        find = file_map.find
+        while True:
+            end = find(b"\n", pos)
+            if end < 0:
+                return None
+            if end - pos == 1 and file_map[pos] == 0x7d:
+                break
+            sep = find(b'": {', pos, end)
+            if sep < 0:
+                return None
+            key = file_map[pos + 1:sep]
+            if b"\\" in key:
+                return None
+            stop = end - 1 if file_map[end - 1] == 0x2c else end
+            spans[key.decode()] = (sep + 3, stop)
+            pos = end + 1
+        return cls(file_map, spans)
+
+    def __len__(self) -> int:
+        """ Number of objects
+        """
+        return len(self._spans)
+
+    def __contains__(self, obj_id: str) -> bool:
+        """ Whether obj_id is in the snapshot
+        """
+        return obj_id in self._spans
+
+    def get(self, obj_id: str) -> Optional[dict]:
+        """ Object obj_id, None if absent
+        """
+        span = self._spans.get(obj_id)
+        if span is None:
+            return None
+        return json.loads(self._map[span[0]:span[1]])
+
+    def lookup(self, attr: str, value: str) -> List[Tuple[str, dict]]:
+        """ (id, object) of the objects whose attr is value, by a scan:
+        this layout has no index, so Base never asks
+        """
+        return [(obj_id, obj) for obj_id, obj in self.items()
+                if obj.get(attr) == value]
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """ Iterates over (id, object)
+        """
+        file_map = self._map
+        for obj_id, (start, end) in self._spans.items():
+            yield obj_id, json.loads(file_map[start:end])
+
+
+class BinarySnapshot(Snapshot):
+    """ .db_<Class>.bin: fixed-width records pointing into a string heap,
+    an open-addressing hash table on id and one per indexed attribute.
+    Layout, little-endian:
+      - header: magic, field count, index count, record count, table
+        capacity, heap size
+      - field names then indexed attribute names, u16 length + utf-8
+      - records: (u64 heap offset, u32 length) per field, length NONE
+        for None and JSON flag set for values that are not str
+      - id table: capacity u32, record + 1 (0: empty slot)
+      - per index: capacity u32 head record + 1, then record count u32
+        next record + 1 with the same value (0: end of chain)
+      - heap
+    Slots are found by crc32 of the utf-8 value and linear probing.
+    """
+    MAGIC = b"BASEBIN1"
+    HEADER = struct.Struct("<8sIIQQQ")
+    FIELD = struct.Struct("<QI")
+    U32 = struct.Struct("<I")
+    NONE = 0xFFFFFFFF
+    JSON = 0x80000000
+
+    def __init__(self, file_map: mmap.mmap):
+        """ Parses the header of the mapping
+        Raises: ValueError if it is not a binary snapshot
+        """
+        self._map = file_map
+        (magic, n_fields, n_indexes, self._count, self._capacity,
+         heap_size) = self.HEADER.unpack_from(file_map, 0)
+        if magic != self.MAGIC:
+            raise ValueError("not a binary snapshot")
+        pos = self.HEADER.size
+        names = []
+        for _ in range(n_fields + n_indexes):
+            length = struct.unpack_from("<H", file_map, pos)[0]
+            names.append(file_map[pos + 2:pos + 2 + length].decode())
+            pos += 2 + length
+        self.fields = tuple(names[:n_fields])
+        self.indexed = tuple(names[n_fields:])
+        self._record = struct.Struct("<" + "QI" * n_fields)
+        self._records_at = pos + (-pos % 8)
+        self._id_table_at = self._records_at + \
+            self._count * self._record.size
+        table_size = self._capacity * 4
+        self._index_at = {}
+        pos = self._id_table_at + table_size
+        for attr in self.indexed:
+            self._index_at[attr] = (pos, pos + table_size)
+            pos += table_size + self._count * 4
+        self._heap_at = pos
+        self._id_field = self.fields.index('id')
+
+    @classmethod
+    def open(cls, file_path: str) -> Optional['BinarySnapshot']:
+        """ Maps file_path, None if it is empty
+        """
+        file_map = map_file(file_path)
+        if file_map is None:
+            return None
+        return cls(file_map)
+
+    def _value(self, offset: int, length: int):
+        """ Field value stored at offset in the heap
+        """
+        if length == self.NONE:
+            return None
+        start = self._heap_at + offset
+        if length & self.JSON:
+            return json.loads(self._map[start:start + (length ^ self.JSON)])
+        return self._map[start:start + length].decode()
+
+    def _raw(self, record: int, field: int) -> Optional[bytes]:
+        """ Bytes of a str field of record, None otherwise
+        """
+        offset, length = self.FIELD.unpack_from(
+            self._map, self._records_at + record * self._record.size +
+            field * self.FIELD.size)
+        if length == self.NONE or length & self.JSON:
+            return None
+        start = self._heap_at + offset
+        return self._map[start:start + length]
+
+    def record(self, record: int) -> dict:
+        """ Object stored in record
+        """
+        refs = self._record.unpack_from(
+            self._map, self._records_at + record * self._record.size)
+        value = self._value
+        return {name: value(refs[2 * i], refs[2 * i + 1])
+                for i, name in enumerate(self.fields)}
+
+    def _find(self, table_at: int, field: int, value: str) -> int:
+        """ Record of value in the hash table at table_at, -1 if absent
+        """
+        key = value.encode()
+        mask = self._capacity - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            entry = self.U32.unpack_from(self._map, table_at + slot * 4)[0]
+            if entry == 0:
+                return -1
+            if self._raw(entry - 1, field) == key:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def __len__(self) -> int:
+        """ Number of objects
+        """
+        return self._count
+
+    def __contains__(self, obj_id: str) -> bool:
+        """ Whether obj_id is in the snapshot
+        """
+        return self._count > 0 and \
+            self._find(self._id_table_at, self._id_field, obj_id) >= 0
+
+    def get(self, obj_id: str) -> Optional[dict]:
+        """ Object obj_id, None if absent
+        """
+        if self._count == 0:
+            return None
+        record = self._find(self._id_table_at, self._id_field, obj_id)
+        return self.record(record) if record >= 0 else None
+
+    def lookup(self, attr: str, value: str) -> List[Tuple[str, dict]]:
+        """ (id, object) of the objects whose attr is value
+        """
+        if self._count == 0:
+            return []
+        table_at, next_at = self._index_at[attr]
+        record = self._find(table_at, self.fields.index(attr), value)
+        found = []
+        while record >= 0:
+            obj = self.record(record)
+            found.append((obj['id'], obj))
+            record = self.U32.unpack_from(
+                self._map, next_at + record * 4)[0] - 1
+        return found
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """ Iterates over (id, object)
+        """
+        for record in range(self._count):
+            obj = self.record(record)
+            yield obj['id'], obj
+
+    @classmethod
+    def write(cls, file_path: str, fields: Tuple[str, ...],
+              indexed: Tuple[str, ...], objs: Iterable[dict]) -> None:
+        """ Writes objs, dicts of fields, to file_path through a
+        temporary file renamed over it
+        """
+        indexed = tuple(attr for attr in indexed if attr in fields)
+        record_struct = struct.Struct("<" + "QI" * len(fields))
+        records = []
+        heap = []
+        heap_size = 0
+        id_keys = []
+        postings = {attr: {} for attr in indexed}
+        for number, obj in enumerate(objs):
+            refs = []
+            for name in fields:
+                value = obj.get(name)
+                if value is None:
+                    refs += (0, cls.NONE)
+                    continue
+                if isinstance(value, str):
+                    data, flag = value.encode(), 0
+                else:
+                    data, flag = json.dumps(value).encode(), cls.JSON
+                refs += (heap_size, len(data) | flag)
+                heap.append(data)
+                heap_size += len(data)
+                if name == 'id':
+                    id_keys.append(data)
+                elif name in postings and not flag:
+                    postings[name].setdefault(data, []).append(number)
+            records.append(record_struct.pack(*refs))
+        count = len(records)
+        capacity = 8
+        while capacity < 2 * count:
+            capacity *= 2
+
+        def table(keys: Iterable[Tuple[bytes, int]]) -> array:
+            slots = array('I', bytes(4 * capacity))
+            mask = capacity - 1
+            for key, record in keys:
+                slot = zlib.crc32(key) & mask
+                while slots[slot]:
+                    slot = (slot + 1) & mask
+                slots[slot] = record + 1
+            return slots
+
+        names = b"".join(struct.pack("<H", len(name.encode())) +
+                         name.encode() for name in fields + indexed)
+        header = cls.HEADER.pack(cls.MAGIC, len(fields), len(indexed),
+                                 count, capacity, heap_size) + names
+        with open(file_path + ".tmp", 'wb') as f:
+            f.write(header + bytes(-len(header) % 8))
+            f.write(b"".join(records))
+            table(zip(id_keys, range(count))).tofile(f)
+            for attr in indexed:
+                chains = array('I', bytes(4 * count))
+                heads = []
+                for key, numbers in postings[attr].items():
+                    heads.append((key, numbers[0]))
+                    for current, following in zip(numbers, numbers[1:]):
+                        chains[current] = following + 1
+                table(heads).tofile(f)
+                chains.tofile(f)
+            f.write(b"".join(heap))
+        replace(file_path + ".tmp", file_path)
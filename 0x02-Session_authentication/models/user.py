@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 """ User module
 """
+from typing import List, TypeVar
 import hashlib
-from models.base import Base
+from models.base import Base, reading
+from models.metrics import timed
 
 
 class User(Base):
     """ User class
     """
+    __slots__ = ('email', '_password', 'first_name', 'last_name')
+    _indexed_attributes = ('email', 'first_name', 'last_name')
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
@@ -25,6 +29,7 @@ class User(Base):
         return self._password
 
     @password.setter
+    @timed('hash_password')
     def password(self, pwd: str):
         """ Setter of a new password: encrypt in SHA256
         """
@@ -33,6 +38,7 @@ class User(Base):
         else:
             self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
 
+    @timed('check_password')
     def is_valid_password(self, pwd: str) -> bool:
         """ Validate a password
         """
@@ -43,6 +49,17 @@ class User(Base):
         pwd_e = pwd.encode()
         return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
 
+    @classmethod
+    @reading
+    def search_name(cls, name: str) -> List[TypeVar('User')]:
+        """ Users whose first or last name is name, from the indexes
+        """
+        users = {}
+        for attr in ('first_name', 'last_name'):
+            for user in cls._index_lookup({attr: name}):
+                users[user.id] = user
+        return list(users.values())
+
     def display_name(self) -> str:
         """ Display User name based on email/first_name/last_name
         """
@@ -7,6 +7,8 @@ from models.base import Base
 class UserSession(Base):
     """ User Session Class.
     """
+    __slots__ = ('user_id', 'session_id')
+    _indexed_attributes = ('session_id', 'user_id')
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Constructor Method.
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+""" Stress test of the model store under threads: readers search, get,
+count and page through seeded users while writers save, update and
+remove their own users (alone or in batches) and a maintenance thread
+reloads, syncs and snapshots the files. Any exception in a thread or
+any inconsistency left in memory or on disk fails the run.
+  python3 stress_test.py [--threads 8] [--seconds 5] [--users 2000]
+                         [--format json|binary] [--lazy]
+"""
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+import argparse
+import os
+import random
+import sys
+import threading
+import traceback
+
+
+def seed_email(i: int) -> str:
+    """ Email of the i-th seeded user
+    """
+    return "seed{}@example.com".format(i)
+
+
+class Stress():
+    """ Shared state of the threads of one run
+    """
+
+    def __init__(self, users: int, seconds: float):
+        """ Initialization
+        """
+        self.users = users
+        self.deadline = monotonic() + seconds
+        self.errors = []
+        self.operations = 0
+        self.lock = threading.Lock()
+        self.expected = {}
+
+    def running(self) -> bool:
+        """ Whether the run goes on
+        """
+        return not self.errors and monotonic() < self.deadline
+
+    def check(self, condition: bool, message: str) -> None:
+        """ Raises AssertionError with message unless condition holds
+        """
+        if not condition:
+            raise AssertionError(message)
+
+    def thread(self, name: str, body) -> threading.Thread:
+        """ Thread running body(rng) until the deadline, recording
+        errors and the number of operations
+        """
+        def run():
+            rng = random.Random(name)
+            done = 0
+            try:
+                while self.running():
+                    body(rng)
+                    done += 1
+            except Exception:
+                self.errors.append("{}: {}".format(name,
+                                                   traceback.format_exc()))
+            with self.lock:
+                self.operations += done
+        return threading.Thread(target=run, name=name)
+
+    def reader(self, rng: random.Random) -> None:
+        """ One lookup of a seeded user, which writers never touch
+        """
+        from models.user import User
+        i = rng.randrange(self.users)
+        kind = rng.random()
+        if kind < 0.5:
+            found = User.search({'email': seed_email(i)})
+            self.check(len(found) == 1 and found[0].email == seed_email(i),
+                       "search email {}: {}".format(i, found))
+        elif kind < 0.7:
+            name = "Last{}".format(i)
+            found = User.search_name(name)
+            self.check(len(found) == 1 and found[0].last_name == name,
+                       "search_name {}: {}".format(name, found))
+        elif kind < 0.9:
+            self.check(User.count() >= self.users, "count")
+        else:
+            page = User.page(limit=50)
+            keys = [user.order_key() for user in page]
+            self.check(keys == sorted(keys) and len(set(keys)) == len(keys),
+                       "page order")
+
+    def writer(self, number: int):
+        """ Body of the number-th writer: creates, updates and removes
+        users of its own, remembering their expected last name
+        """
+        from models.user import User
+        expected = self.expected.setdefault(number, {})
+        mine = {}
+
+        def change(rng: random.Random) -> None:
+            key = rng.randrange(50)
+            email = "writer{}-{}@example.com".format(number, key)
+            user = mine.get(key)
+            if user is None or User.get(user.id) is None:
+                user = User(email=email, first_name="Writer")
+                mine[key] = user
+            if rng.random() < 0.2:
+                user.remove()
+                del mine[key]
+                expected[email] = None
+            else:
+                user.last_name = "v{}".format(rng.randrange(1000))
+                user.save()
+                expected[email] = user.last_name
+
+        def body(rng: random.Random) -> None:
+            if rng.random() < 0.1:
+                with User.batch():
+                    for _ in range(rng.randrange(2, 20)):
+                        change(rng)
+            else:
+                change(rng)
+        return body
+
+    def maintenance(self, rng: random.Random) -> None:
+        """ Reload, sync or snapshot of the users file, every few
+        milliseconds
+        """
+        from models.user import User
+        sleep(0.005)
+        kind = rng.random()
+        if kind < 0.1:
+            User.load_from_file()
+        elif kind < 0.3:
+            User.save_to_file()
+        else:
+            User.sync_from_file()
+
+    def verify(self) -> None:
+        """ Checks the writers' users, the indexes and the ordering in
+        memory, then the same users once reloaded from the files
+        """
+        from models import base
+        from models.user import User
+        for source in ("memory", "files"):
+            if source == "files":
+                User.load_from_file()
+            for number, expected in self.expected.items():
+                for email, last_name in expected.items():
+                    found = User.search({'email': email})
+                    actual = found[0].last_name if found else None
+                    self.check(len(found) <= 1 and actual == last_name,
+                               "{} {}: {} instead of {}".format(
+                                   source, email, actual, last_name))
+            User.all()
+            objs = base.DATA['User']
+            self.check(len(objs) == User.count(), source + " count")
+            self.check(base.ORDERS['User'] == sorted(
+                obj.order_key() for obj in objs.values()),
+                source + " ordering")
+            for attr in User._indexed_attributes:
+                index = base.INDEXES['User'][attr]
+                self.check(sum(map(len, index.values())) == len(objs) and
+                           all(obj_id in index[getattr(obj, attr)]
+                               for obj_id, obj in objs.items()),
+                           "{} {} index".format(source, attr))
+
+
+def main() -> int:
+    """ Runs the stress test in a temporary directory
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--format', choices=('json', 'binary'),
+                        default='json')
+    parser.add_argument('--lazy', action='store_true')
+    args = parser.parse_args()
+    os.environ['STORE_FORMAT'] = args.format
+    os.environ['STORE_LOADING'] = 'lazy' if args.lazy else 'eager'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    with TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from models.user import User
+        User.load_from_file()
+        with User.batch():
+            for i in range(args.users):
+                User(email=seed_email(i), first_name="Seed",
+                     last_name="Last{}".format(i)).save()
+        User.save_to_file()
+        User.load_from_file()
+
+        stress = Stress(args.users, args.seconds)
+        writers = max(1, args.threads // 4)
+        threads = [stress.thread("writer-{}".format(i), stress.writer(i))
+                   for i in range(writers)]
+        threads += [stress.thread("reader-{}".format(i), stress.reader)
+                    for i in range(max(1, args.threads - writers))]
+        threads.append(stress.thread("maintenance", stress.maintenance))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if not stress.errors:
+            try:
+                stress.verify()
+            except AssertionError:
+                stress.errors.append("verify: " + traceback.format_exc())
+        os.chdir("/")
+    for error in stress.errors:
+        print(error, file=sys.stderr)
+    print("{} threads, {} operations, {} errors".format(
+        len(threads), stress.operations, len(stress.errors)))
+    return 1 if stress.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,49 @@
 """
 Simple Flask app with user authentication features.
 """
+from concurrent.futures.process import BrokenProcessPool
 from flask import Flask, jsonify, request, abort, redirect, url_for
 from auth import Auth
+from hashing import HashingOverloaded, get_hashing_executor
+import threading
 app = Flask(__name__)
-AUTH = Auth()
+AUTH = None
+AUTH_LOCK = threading.Lock()
+
+
+def get_auth() -> Auth:
+    """ Returns the app's Auth, built on first use: the hashing workers
+    import this module and must not bootstrap the database
+    """
+    global AUTH
+    if AUTH is None:
+        with AUTH_LOCK:
+            if AUTH is None:
+                AUTH = Auth()
+    return AUTH
+
+
+@app.errorhandler(HashingOverloaded)
+def hashing_overloaded(error) -> str:
+    """ Too many password hashes pending, ask the client to retry
+    """
+    return jsonify({"message": "too many requests"}), 429, \
+        {"Retry-After": "1"}
+
+
+@app.errorhandler(BrokenProcessPool)
+def hashing_unavailable(error) -> str:
+    """ The hashing workers died twice in a row, ask the client to retry
+    """
+    return jsonify({"message": "service unavailable"}), 503, \
+        {"Retry-After": "1"}
+
+
+@app.teardown_appcontext
+def release_db_session(exception=None) -> None:
+    """ Returns the request's database connection to the pool
+    """
+    get_auth().release_session()
 
 
 @app.route('/', methods=['GET'])
@@ -17,13 +56,13 @@ def index() -> str:
 
 @app.route('/users', methods=['POST'])
 def users() -> str:
-    """ Registers a user using AUTH
+    """ Registers a user using get_auth()
     returns: Account creation payload
     """
     password = request.form.get('password')
     email = request.form.get('email')
     try:
-        AUTH.register_user(email, password)
+        get_auth().register_user(email, password)
         return jsonify({"email": email, "message": "user created"})
     except ValueError:
         return jsonify({"message": "email already registered"}), 400
@@ -36,8 +75,8 @@ def login() -> str:
     """
     password = request.form.get('password')
     email = request.form.get('email')
-    if AUTH.valid_login(email, password):
-        sess_id = AUTH.create_session(email)
+    if get_auth().valid_login(email, password):
+        sess_id = get_auth().create_session(email)
         resp = jsonify({"email": email, "message": "logged in"})
         resp.set_cookie("session_id", sess_id)
         return resp
@@ -53,10 +92,10 @@ def logout() -> str:
     sess_id = request.cookies.get('session_id')
     if not sess_id:
         abort(403)
-    usr = AUTH.get_user_from_session_id(sess_id)
+    usr = get_auth().get_user_from_session_id(sess_id)
     if not usr:
         abort(403)
-    AUTH.destroy_session(usr.id)
+    get_auth().destroy_session(usr.id)
     return redirect('/')
 
 
@@ -65,7 +104,7 @@ def profile():
     """ Finds user if existing in session or abort
     """
     sess_id = request.cookies.get('session_id')
-    usr = AUTH.get_user_from_session_id(sess_id)
+    usr = get_auth().get_user_from_session_id(sess_id)
     if usr:
         return jsonify({"email": usr.email}), 200
     abort(403)
@@ -78,7 +117,7 @@ def get_reset_password_token() -> str:
     email = request.form.get("email")
     token_reset = None
     try:
-        token_reset = AUTH.get_reset_password_token(email)
+        token_reset = get_auth().get_reset_password_token(email)
     except ValueError:
         token_reset = None
     if token_reset is None:
@@ -99,11 +138,15 @@ def update_password():
         abort(400)
 
     try:
-        AUTH.update_password(reset_token, new_password)
+        get_auth().update_password(reset_token, new_password)
         return jsonify({"email": email, "message": "Password updated"}), 200
+    except HashingOverloaded:
+        raise
     except Exception:
         abort(403)
 
 
 if __name__ == "__main__":
+    get_auth()
+    get_hashing_executor().start()
     app.run(host="0.0.0.0", port="5000")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+ASGI variant of the user authentication app, served with e.g.
+`hypercorn async_app:app` or `uvicorn async_app:app`.
+"""
+from concurrent.futures.process import BrokenProcessPool
+from quart import Quart, jsonify, request, abort, redirect
+from async_auth import AsyncAuth
+from hashing import HashingOverloaded, get_hashing_executor
+app = Quart(__name__)
+AUTH = None
+
+
+def get_auth() -> AsyncAuth:
+    """ Returns the app's AsyncAuth, built on first use: the hashing
+    workers import this module and must not bootstrap the database
+    """
+    global AUTH
+    if AUTH is None:
+        AUTH = AsyncAuth()
+    return AUTH
+
+
+@app.before_serving
+async def start_hashing() -> None:
+    """ Sets up the database and starts the hashing workers before the
+    first request
+    """
+    get_auth()
+    get_hashing_executor().start()
+
+
+@app.errorhandler(HashingOverloaded)
+async def hashing_overloaded(error) -> str:
+    """ Too many password hashes pending, ask the client to retry
+    """
+    return jsonify({"message": "too many requests"}), 429, \
+        {"Retry-After": "1"}
+
+
+@app.errorhandler(BrokenProcessPool)
+async def hashing_unavailable(error) -> str:
+    """ The hashing workers died twice in a row, ask the client to retry
+    """
+    return jsonify({"message": "service unavailable"}), 503, \
+        {"Retry-After": "1"}
+
+
+@app.route('/', methods=['GET'])
+async def index() -> str:
+    """ Index route that returns json paylod
+    """
+    return jsonify({"message": "Bienvenue"})
+
+
+@app.route('/users', methods=['POST'])
+async def users() -> str:
+    """ Registers a user using get_auth()
+    returns: Account creation payload
+    """
+    form = await request.form
+    password = form.get('password')
+    email = form.get('email')
+    try:
+        await get_auth().register_user(email, password)
+        return jsonify({"email": email, "message": "user created"})
+    except ValueError:
+        return jsonify({"message": "email already registered"}), 400
+
+
+@app.route('/sessions', methods=['POST'])
+async def login() -> str:
+    """ Creates new session for user & stores in cookie
+    returns account login payload
+    """
+    form = await request.form
+    password = form.get('password')
+    email = form.get('email')
+    if await get_auth().valid_login(email, password):
+        sess_id = await get_auth().create_session(email)
+        resp = jsonify({"email": email, "message": "logged in"})
+        resp.set_cookie("session_id", sess_id)
+        return resp
+    else:
+        abort(401)
+
+
+@app.route('/sessions', methods=['DELETE'], strict_slashes=False)
+async def logout() -> str:
+    """ Finds user associated with session_id, if exists destroy session
+    Returns: Redirects to home route, if doesn't exist raise 403 error
+    """
+    sess_id = request.cookies.get('session_id')
+    if not sess_id:
+        abort(403)
+    usr = await get_auth().get_user_from_session_id(sess_id)
+    if not usr:
+        abort(403)
+    await get_auth().destroy_session(usr.id)
+    return redirect('/')
+
+
+@app.route('/profile', methods=['GET'])
+async def profile():
+    """ Finds user if existing in session or abort
+    """
+    sess_id = request.cookies.get('session_id')
+    usr = await get_auth().get_user_from_session_id(sess_id)
+    if usr:
+        return jsonify({"email": usr.email}), 200
+    abort(403)
+
+
+@app.route("/reset_password", methods=["POST"], strict_slashes=False)
+async def get_reset_password_token() -> str:
+    """ Generate a password reset token
+    """
+    form = await request.form
+    email = form.get("email")
+    try:
+        token_reset = await get_auth().get_reset_password_token(email)
+    except ValueError:
+        abort(403)
+    return jsonify({"email": email, "reset_token": token_reset})
+
+
+@app.route('/reset_password', methods=['PUT'], strict_slashes=False)
+async def update_password():
+    """ Update password
+    Return: User's password updated payload.
+    """
+    form = await request.form
+    try:
+        email = form['email']
+        reset_token = form['reset_token']
+        new_password = form['new_password']
+    except KeyError:
+        abort(400)
+
+    try:
+        await get_auth().update_password(reset_token, new_password)
+        return jsonify({"email": email, "message": "Password updated"}), 200
+    except HashingOverloaded:
+        raise
+    except Exception:
+        abort(403)
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5000)
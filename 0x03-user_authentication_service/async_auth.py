@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+""" Module contains the async counterpart of the Auth class
+"""
+from async_db import AsyncDB
+from auth import _generate_uuid
+from hashing import get_hashing_executor
+from user import User
+from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.exc import InvalidRequestError
+from typing import Optional
+
+
+async def _hash_password(password: str) -> bytes:
+    """ Takes in password argument, hashed off the event loop
+    Returns: bytes which are salted hash of input
+    """
+    return await get_hashing_executor().async_hashpw(password.encode())
+
+
+class AsyncAuth:
+    """ AsyncAuth class to interact with authentication database.
+    """
+
+    def __init__(self):
+        """ Initialize instances of authentication
+        """
+        self._db = AsyncDB()
+
+    async def register_user(self, email: str, password: str) -> User:
+        """ Adds a new user to the database
+        Returns: user, if user already exists raise ValueError
+        """
+        try:
+            usr = await self._db.find_user_by(email=email)
+            raise ValueError("User {} already exists".format(usr.email))
+        except (InvalidRequestError, NoResultFound):
+            hashed_pwd = await _hash_password(password)
+            usr = await self._db.add_user(email, hashed_pwd)
+            if usr is None:
+                raise ValueError("User {} already exists".format(email))
+            return usr
+
+    async def valid_login(self, email: str, password: str) -> bool:
+        """ Checks if a user's login details are correct and valid
+        Returns: True otherwise False
+        """
+        try:
+            usr = await self._db.find_user_by(email=email)
+        except (InvalidRequestError, NoResultFound):
+            return False
+        return await get_hashing_executor().async_checkpw(
+            password.encode(), usr.hashed_password)
+
+    async def create_session(self, email: str) -> Optional[str]:
+        """ Creates new session for user
+        Returns: session id
+        """
+        sess_id = _generate_uuid()
+        try:
+            if await self._db.update_user_by({'email': email},
+                                             session_id=sess_id):
+                return sess_id
+        except Exception:
+            return None
+        return None
+
+    async def get_user_from_session_id(self,
+                                       session_id: str) -> Optional[User]:
+        """ Retrieves user based on given session ID
+        Returns: user in session_id or None if not found
+        """
+        if session_id is None:
+            return None
+        try:
+            return await self._db.find_user_by(session_id=session_id)
+        except Exception:
+            return None
+
+    async def destroy_session(self, user_id: int) -> None:
+        """ Destroys session associated with given user
+        """
+        try:
+            await self._db.update_user(user_id, session_id=None)
+        except Exception:
+            return None
+        return None
+
+    async def get_reset_password_token(self, email: str) -> str:
+        """ Generates a reset token for the user of email
+        or raise a ValueError exception if user doesn't exists
+        """
+        rst_token = _generate_uuid()
+        try:
+            updated = await self._db.update_user_by({'email': email},
+                                                    reset_token=rst_token)
+        except Exception:
+            raise ValueError
+        if not updated:
+            raise ValueError
+        return rst_token
+
+    async def update_password(self, reset_token: str, password: str) -> None:
+        """ Update password of the user holding reset_token
+        or raise a ValueError exception if no user holds it
+        """
+        if reset_token is None or password is None:
+            return None
+
+        hashed_pwd = await _hash_password(password)
+        updated = await self._db.update_user_by({'reset_token': reset_token},
+                                                hashed_password=hashed_pwd,
+                                                reset_token=None)
+        if not updated:
+            raise ValueError
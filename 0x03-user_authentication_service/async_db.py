@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Async DB module, the DB class on SQLAlchemy asyncio and aiosqlite
+"""
+from os import environ
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.exc import InvalidRequestError
+from db import DB, _create_engine, _set_sqlite_pragmas, bootstrap_schema
+from user import User
+
+
+class AsyncDB:
+    """ AsyncDB class, same operations as DB as coroutines
+    """
+
+    def __init__(self, db_url: str = None, pool_size: int = None,
+                 bootstrap: str = None) -> None:
+        """Initialize a new AsyncDB instance.
+        Arguments default like DB's, sqlite URLs use the aiosqlite driver.
+        """
+        if db_url is None:
+            db_url = environ.get("DB_URL", "sqlite:///a.db")
+        if pool_size is None:
+            pool_size = int(environ.get("DB_POOL_SIZE", 5))
+        if bootstrap is None:
+            bootstrap = environ.get("DB_BOOTSTRAP", "create")
+
+        sync_engine = _create_engine(db_url, 1)
+        bootstrap_schema(sync_engine, bootstrap)
+        sync_engine.dispose()
+
+        sqlite = db_url.startswith("sqlite:")
+        if sqlite:
+            db_url = db_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+        self._engine = create_async_engine(db_url, echo=False,
+                                           pool_size=pool_size,
+                                           max_overflow=pool_size)
+        if sqlite:
+            event.listen(self._engine.sync_engine, "connect",
+                         _set_sqlite_pragmas)
+        self._sessionmaker = async_sessionmaker(self._engine,
+                                                expire_on_commit=False)
+
+    def _session(self) -> AsyncSession:
+        """New session, used for a single operation.
+        """
+        return self._sessionmaker()
+
+    async def add_user(self, email: str, hashed_password: str) -> User:
+        """ Uses email and hashed password to create new user
+        Returns: user
+        """
+        async with self._session() as session:
+            try:
+                usr = User(email=email, hashed_password=hashed_password)
+                session.add(usr)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                usr = None
+        return usr
+
+    async def find_user_by(self, **kwargs) -> User:
+        """ Filters for user using kwargs
+        returns: the user
+        """
+        if not kwargs:
+            raise InvalidRequestError
+
+        column_keys = User.__table__.columns.keys()
+        for k in kwargs.keys():
+            if k not in column_keys:
+                raise InvalidRequestError
+
+        async with self._session() as session:
+            result = await session.execute(
+                select(User).filter_by(**kwargs).limit(1))
+            usr = result.scalars().first()
+
+        if usr is None:
+            raise NoResultFound
+
+        return usr
+
+    async def update_user(self, user_id: int, **kwargs) -> None:
+        """ Updates a user based on a given id, or raises ValueError
+        if attribute not present.
+        """
+        if not await self.update_user_by({'id': user_id}, **kwargs):
+            raise NoResultFound
+
+    async def update_user_by(self, filters: dict, **kwargs) -> int:
+        """ Updates the users matching filters in a single statement
+        Returns: number of updated users
+        """
+        values = DB._column_values(kwargs)
+        stmt = update(User.__table__).values(**values)
+        filters = DB._column_values(filters, InvalidRequestError)
+        for k, val in filters.items():
+            stmt = stmt.where(User.__table__.c[k] == val)
+        async with self._session() as session:
+            count = (await session.execute(stmt)).rowcount
+            await session.commit()
+        return count
+
+    async def dispose(self) -> None:
+        """ Closes every pooled connection
+        """
+        await self._engine.dispose()
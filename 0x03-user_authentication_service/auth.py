@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 """ Module contains authentication methods for users
 """
-import bcrypt
 from db import DB
+from hashing import get_hashing_executor
 from user import User
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import InvalidRequestError
 from uuid import uuid4
-from typing import Optional
+from typing import List, Optional
 
 
 def _hash_password(password: str) -> bytes:
@@ -15,11 +15,11 @@ def _hash_password(password: str) -> bytes:
     Returns: bytes which are salted hash of input
     """
     bytes_pass = password.encode()
-    passwd_hash = bcrypt.hashpw(bytes_pass, bcrypt.gensalt())
+    passwd_hash = get_hashing_executor().hashpw(bytes_pass)
     return passwd_hash
 
 
-def _generate_uuid(self) -> str:
+def _generate_uuid() -> str:
     """ Returns a string representation of new UUID
     """
     UUID = uuid4()
@@ -35,6 +35,11 @@ class Auth:
         """
         self._db = DB()
 
+    def release_session(self) -> None:
+        """ Releases the database session of the current request
+        """
+        self._db.remove_session()
+
     def register_user(self, email: str, password: str) -> User:
         """ Adds a new user to the database
         Returns: user, if user already exists raise ValueError
@@ -45,6 +50,8 @@ class Auth:
         except (InvalidRequestError, NoResultFound):
             hashed_pwd = _hash_password(password)
             usr = self._db.add_user(email, hashed_pwd)
+            if usr is None:
+                raise ValueError("User {} already exists".format(email))
             return usr
 
     def valid_login(self, email: str, password: str) -> bool:
@@ -53,7 +60,8 @@ class Auth:
         """
         try:
             usr = self._db.find_user_by(email=email)
-            if bcrypt.checkpw(password.encode(), usr.hashed_password):
+            if get_hashing_executor().checkpw(password.encode(),
+                                              usr.hashed_password):
                 return True
             else:
                 return False
@@ -64,13 +72,13 @@ class Auth:
         """ Creates new session for user
         Returns: session id
         """
+        sess_id = _generate_uuid()
         try:
-            usr = self._db.find_user_by(email=email)
-            sess_id = self._generate_uuid()
-            self._db.update_user(usr.id, session_id=sess_id)
-            return usr.session_id
+            if self._db.update_user_by({'email': email}, session_id=sess_id):
+                return sess_id
         except Exception as e:
             return None
+        return None
 
     def get_user_from_session_id(self, session_id: str) -> Optional[User]:
         """ Retrieves user based on given session ID
@@ -87,23 +95,31 @@ class Auth:
         Returns: user corresponding to user_id as None
         """
         try:
-            usr = self._db.find_user_by(id=user_id)
-            self._db.update_user(usr.id, session_id=None)
+            self._db.update_user(user_id, session_id=None)
         except Exception as e:
             return None
         return None
 
+    def destroy_sessions(self, user_ids: Optional[List[int]] = None) -> int:
+        """ Destroys the sessions of many users at once, of every user
+        if user_ids is None
+        Returns: number of users updated
+        """
+        return self._db.update_users(user_ids, session_id=None)
+
     def get_reset_password_token(self, email: str) -> str:
         """ Updates user's password given user's reset token
         or raise a ValueError exception if user doesn't exists
         """
+        rst_token = _generate_uuid()
         try:
-            usr = self._db.find_user_by(email=email)
-            rst_token = self._generate_uuid()
-            self._db.update_user(usr.id, reset_token=rst_token)
-            return usr.reset_token
+            updated = self._db.update_user_by({'email': email},
+                                              reset_token=rst_token)
         except Exception as e:
             raise ValueError
+        if not updated:
+            raise ValueError
+        return rst_token
 
     def update_password(self, reset_token: str, password: str) -> None:
         """ Update password
@@ -115,12 +131,9 @@ class Auth:
         if reset_token is None or password is None:
             return None
 
-        try:
-            usr = self._db.find_user_by(reset_token=reset_token)
-        except NoResultFound:
-            raise ValueError
-
         hashed_pwd = _hash_password(password)
-        self._db.update_user(usr.id,
-                             hashed_password=hashed_pwd,
-                             reset_token=None)
+        updated = self._db.update_user_by({'reset_token': reset_token},
+                                          hashed_password=hashed_pwd,
+                                          reset_token=None)
+        if not updated:
+            raise ValueError
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+""" Concurrency benchmark of the app behind a multi-threaded WSGI server:
+concurrent sign-ups (writes) mixed with profile lookups (reads)
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib import error, parse, request
+from werkzeug.serving import make_server
+
+DB_FILE = "concurrency_benchmark.db"
+
+
+def call(url: str, data: dict = None, cookie: str = None) -> int:
+    """ Sends one request, returns its status code
+    """
+    body = parse.urlencode(data).encode() if data is not None else None
+    req = request.Request(url, data=body)
+    if cookie is not None:
+        req.add_header("Cookie", "session_id={}".format(cookie))
+    try:
+        with request.urlopen(req) as resp:
+            return resp.status
+    except error.HTTPError as e:
+        return e.code
+
+
+def main(clients: int, requests: int) -> None:
+    """ Runs requests calls from clients threads and prints the throughput,
+    the app working on a fresh DB_FILE
+    """
+    os.environ["DB_URL"] = "sqlite:///" + DB_FILE
+    os.environ["DB_BOOTSTRAP"] = "reset"
+    from app import app
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = "http://127.0.0.1:{}".format(server.server_port)
+
+    def job(i: int) -> int:
+        if i % 4 == 0:
+            return call(base_url + "/users",
+                        {"email": "bench{}@example.com".format(i),
+                         "password": "pwd"})
+        return call(base_url + "/profile", cookie="session-{}".format(i))
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        start = time.perf_counter()
+        statuses = list(pool.map(job, range(requests)))
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    errors = sum(1 for s in statuses if s >= 500)
+    print("clients={} requests={} {:.1f} req/s, {} server errors".format(
+        clients, requests, requests / elapsed, errors))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 400)
@@ -1,36 +1,146 @@
 #!/usr/bin/env python3
 """DB module that connects & intializes database
 """
-from sqlalchemy import create_engine, tuple_
+from os import environ
+import time
+from sqlalchemy import (Column, Integer, Table, create_engine, event,
+                        inspect, select, tuple_, update)
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm.session import Session
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.exc import (IntegrityError, InvalidRequestError,
+                            OperationalError)
 from user import User
 from user import Base
+from typing import Iterable, Optional
+
+
+UPDATE_BATCH_SIZE = 500
+SCHEMA_VERSION = 1
+schema_version = Table("schema_version", Base.metadata,
+                       Column("version", Integer, nullable=False))
+
+
+def _create_engine(db_url: str, pool_size: int) -> Engine:
+    """Creates a pooled engine, a SQLite file database is shared across
+    threads and switched to WAL so readers don't block the writer
+    """
+    if not db_url.startswith("sqlite"):
+        return create_engine(db_url, echo=False, pool_size=pool_size,
+                             pool_pre_ping=True)
+
+    engine = create_engine(db_url, echo=False, poolclass=QueuePool,
+                           pool_size=pool_size, max_overflow=pool_size,
+                           connect_args={"check_same_thread": False,
+                                         "timeout": 30})
+
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def _set_sqlite_pragmas(dbapi_conn, conn_record) -> None:
+    """Switches every new SQLite connection to WAL journaling
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def upgrade_indexes(bind: Connection) -> None:
+    """Creates the indexes declared on the models that an existing
+    database lacks, without touching its data
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+def _migrate_v1(conn: Connection) -> None:
+    """Version 1: users table with its lookup indexes
+    """
+    Base.metadata.create_all(conn)
+    upgrade_indexes(conn)
+
+
+MIGRATIONS = {1: _migrate_v1}
+
+
+def _current_version(conn: Connection) -> int:
+    """Returns the schema version recorded in the database, 0 if none
+    """
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    version = conn.execute(select(schema_version.c.version)).scalar()
+    return version or 0
+
+
+def bootstrap_schema(engine: Engine, mode: str = "create") -> None:
+    """Brings the schema to SCHEMA_VERSION.
+    mode:
+      - create: create what is missing, run pending migrations (default)
+      - reset: drop every table first, wiping the data
+      - none: trust the schema, for the fastest worker startup
+    Workers racing on a shared database retry until one of them has
+    recorded the version.
+    """
+    if mode == "none":
+        return
+    if mode == "reset":
+        Base.metadata.drop_all(engine)
+    for attempt in range(5):
+        try:
+            with engine.begin() as conn:
+                current = _current_version(conn)
+                if current >= SCHEMA_VERSION:
+                    return
+                for version in range(current + 1, SCHEMA_VERSION + 1):
+                    MIGRATIONS[version](conn)
+                conn.execute(schema_version.delete())
+                conn.execute(schema_version.insert().values(
+                    version=SCHEMA_VERSION))
+            return
+        except (IntegrityError, OperationalError):
+            if attempt == 4:
+                raise
+            time.sleep(0.05 * (attempt + 1))
 
 
 class DB:
     """ DB class
     """
 
-    def __init__(self) -> None:
+    def __init__(self, db_url: str = None, pool_size: int = None,
+                 bootstrap: str = None) -> None:
         """Initialize a new DB instance.
+        db_url, pool_size and bootstrap default to the DB_URL,
+        DB_POOL_SIZE and DB_BOOTSTRAP environment variables, then to
+        sqlite:///a.db, 5 and create (see bootstrap_schema).
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
-        Base.metadata.create_all(self._engine)
-        self.__session = None
+        if db_url is None:
+            db_url = environ.get("DB_URL", "sqlite:///a.db")
+        if pool_size is None:
+            pool_size = int(environ.get("DB_POOL_SIZE", 5))
+        if bootstrap is None:
+            bootstrap = environ.get("DB_BOOTSTRAP", "create")
+        self._engine = _create_engine(db_url, pool_size)
+        bootstrap_schema(self._engine, bootstrap)
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object.
+        """Session object of the calling thread.
+        """
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """Closes the session of the calling thread, returning its
+        connection to the pool. Called at the end of each request.
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """ Uses email and hashed password to create new user
@@ -68,9 +178,62 @@ class DB:
         """ Updates a user based on a given id, or raises ValueError
         if attribute not present.
         """
-        usr = self.find_user_by(id=user_id)
-        for k, val in kwargs.items():
-            if getattr(usr, str(k), 'None') == 'None':
-                raise ValueError
-            setattr(usr, str(k), val)
-        self._session.commit()
+        if not self.update_user_by({'id': user_id}, **kwargs):
+            raise NoResultFound
+
+    def update_user_by(self, filters: dict, **kwargs) -> int:
+        """ Updates the users matching filters in a single
+        UPDATE ... WHERE statement, without loading them.
+        Returns: number of updated users
+        """
+        values = self._column_values(kwargs)
+        stmt = update(User.__table__).values(**values)
+        filters = self._column_values(filters, InvalidRequestError)
+        for k, val in filters.items():
+            stmt = stmt.where(User.__table__.c[k] == val)
+        try:
+            count = self._session.execute(stmt).rowcount
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return count
+
+    def update_users(self, user_ids: Optional[Iterable[int]] = None,
+                     **kwargs) -> int:
+        """ Updates many users at once, e.g. session_id=None for mass
+        session invalidation. user_ids None updates every user.
+        Returns: number of updated users
+        """
+        values = self._column_values(kwargs)
+        table = User.__table__
+        try:
+            if user_ids is None:
+                count = self._session.execute(
+                    update(table).values(**values)).rowcount
+            else:
+                user_ids = list(user_ids)
+                count = 0
+                for i in range(0, len(user_ids), UPDATE_BATCH_SIZE):
+                    chunk = user_ids[i:i + UPDATE_BATCH_SIZE]
+                    count += self._session.execute(
+                        update(table).where(table.c.id.in_(chunk))
+                        .values(**values)).rowcount
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return count
+
+    @staticmethod
+    def _column_values(kwargs: dict, error: type = ValueError) -> dict:
+        """ Checks every key of kwargs is a users column
+        Raises: error otherwise
+        """
+        if not kwargs:
+            raise error
+        column_keys = User.__table__.columns.keys()
+        for k in kwargs.keys():
+            if k not in column_keys:
+                raise error
+        return kwargs
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+""" Module offloading bcrypt hashing to a pool of worker processes
+"""
+import asyncio
+import bcrypt
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+
+class HashingOverloaded(Exception):
+    """ Raised when the hashing queue is full
+    """
+
+
+def _hashpw(password: bytes) -> bytes:
+    """ Salts and hashes password, runs in a worker process
+    """
+    return bcrypt.hashpw(password, bcrypt.gensalt())
+
+
+def _checkpw(password: bytes, hashed_password: bytes) -> bool:
+    """ Checks password against hashed_password, runs in a worker process
+    """
+    return bcrypt.checkpw(password, hashed_password)
+
+
+class HashingExecutor:
+    """ Runs bcrypt in a process pool sized to the cores, with a bounded
+    number of pending jobs so overload is reported instead of queued.
+    Workers are spawned, not forked: forking from a request thread while
+    other threads hold locks (connection pool, logging) can deadlock the
+    child. Call start() when the server starts so no request pays for
+    it, never at import: spawned workers re-import the main module.
+    A pool broken by a dead worker is replaced and the job retried once.
+    """
+
+    def __init__(self, workers: Optional[int] = None,
+                 max_pending: Optional[int] = None) -> None:
+        """ Initialize the executor, workers=0 hashes inline
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if max_pending is None:
+            max_pending = workers * 4
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool_lock = threading.Lock()
+        self._pool = self._new_pool() if workers > 0 else None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """ Returns a pool of workers spawned on demand
+        """
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"))
+
+    def _replace(self, broken: ProcessPoolExecutor) -> None:
+        """ Replaces the pool broken, unless another job already did
+        """
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = self._new_pool()
+        broken.shutdown(wait=False)
+
+    def start(self) -> None:
+        """ Starts the worker processes now rather than on the first job
+        """
+        if self._pool is not None:
+            # one job per worker: the pool spawns one per job it cannot
+            # hand to an idle worker
+            for job in [self._pool.submit(int)
+                        for _ in range(self.workers)]:
+                job.result()
+
+    def _submit(self, fn, *args):
+        """ Submits fn to the pool, to a new one if it is broken
+        """
+        pool = self._pool
+        try:
+            return pool, pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._replace(pool)
+            pool = self._pool
+            return pool, pool.submit(fn, *args)
+
+    def _run(self, fn, *args):
+        """ Runs fn in the pool and waits for its result
+        Raises: HashingOverloaded if max_pending jobs are already queued,
+        BrokenProcessPool if the workers died twice in a row
+        """
+        if self._pool is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded
+        try:
+            pool, job = self._submit(fn, *args)
+            try:
+                return job.result()
+            except BrokenProcessPool:
+                self._replace(pool)
+                return self._submit(fn, *args)[1].result()
+        finally:
+            self._slots.release()
+
+    async def _run_async(self, fn, *args):
+        """ Awaits fn run in the pool, without blocking the event loop
+        Raises: HashingOverloaded if max_pending jobs are already queued
+        """
+        if self._pool is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, fn, *args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded
+        try:
+            pool, job = self._submit(fn, *args)
+            try:
+                return await asyncio.wrap_future(job)
+            except BrokenProcessPool:
+                self._replace(pool)
+                return await asyncio.wrap_future(
+                    self._submit(fn, *args)[1])
+        finally:
+            self._slots.release()
+
+    def hashpw(self, password: bytes) -> bytes:
+        """ Returns the salted hash of password
+        """
+        return self._run(_hashpw, password)
+
+    def checkpw(self, password: bytes, hashed_password: bytes) -> bool:
+        """ Returns True if password matches hashed_password
+        """
+        return self._run(_checkpw, password, hashed_password)
+
+    async def async_hashpw(self, password: bytes) -> bytes:
+        """ Awaitable hashpw
+        """
+        return await self._run_async(_hashpw, password)
+
+    async def async_checkpw(self, password: bytes,
+                            hashed_password: bytes) -> bool:
+        """ Awaitable checkpw
+        """
+        return await self._run_async(_checkpw, password, hashed_password)
+
+    def shutdown(self) -> None:
+        """ Stops the worker processes
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor() -> HashingExecutor:
+    """ Returns the process-wide executor configured by HASH_WORKERS
+    and HASH_MAX_PENDING, created on first use
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = os.environ.get("HASH_WORKERS")
+                max_pending = os.environ.get("HASH_MAX_PENDING")
+                _executor = HashingExecutor(
+                    int(workers) if workers else None,
+                    int(max_pending) if max_pending else None)
+    return _executor
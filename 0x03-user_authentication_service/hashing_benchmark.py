@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+""" Load benchmark of bcrypt login checks through the hashing executor,
+showing throughput as worker processes are added
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashing import HashingExecutor, _hashpw
+
+
+def run(workers: int, requests: int, hashed: bytes) -> float:
+    """ Sends requests concurrent login checks
+    Returns: checks per second
+    """
+    executor = HashingExecutor(workers, max_pending=requests)
+    executor.checkpw(b"warmup", hashed)
+    with ThreadPoolExecutor(max_workers=max(workers, 1) * 2) as clients:
+        start = time.perf_counter()
+        results = list(clients.map(
+            lambda _: executor.checkpw(b"b4l0u", hashed), range(requests)))
+        elapsed = time.perf_counter() - start
+    executor.shutdown()
+    assert all(results)
+    return requests / elapsed
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    hashed = _hashpw(b"b4l0u")
+    baseline = None
+    for workers in sorted({0, 1, 2, 4, os.cpu_count() or 1}):
+        rate = run(workers, requests, hashed)
+        baseline = baseline or rate
+        print("workers={:<3} {:8.1f} logins/s  x{:.2f}".format(
+            workers, rate, rate / baseline))
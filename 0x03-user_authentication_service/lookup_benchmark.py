@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" Seeds a users table and measures the latency of find_user_by
+on email, session_id and reset_token
+"""
+import random
+import sys
+import time
+from db import DB
+from user import User
+
+
+def seed(db: DB, count: int, chunk: int = 50000) -> None:
+    """ Bulk inserts count users with a session and a reset token
+    """
+    for start in range(0, count, chunk):
+        rows = [{"email": "user{}@example.com".format(i),
+                 "hashed_password": "x",
+                 "session_id": "session-{}".format(i),
+                 "reset_token": "token-{}".format(i)}
+                for i in range(start, min(start + chunk, count))]
+        db._session.execute(User.__table__.insert(), rows)
+        db._session.commit()
+
+
+def percentile(samples: list, pct: float) -> float:
+    """ Returns the pct percentile of sorted samples
+    """
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def main(count: int, lookups: int = 2000) -> None:
+    """ Seeds count users then times lookups on every indexed column
+    """
+    db = DB("sqlite:///lookup_benchmark.db", bootstrap="reset")
+    start = time.perf_counter()
+    seed(db, count)
+    print("seeded {} users in {:.1f}s".format(
+        count, time.perf_counter() - start))
+
+    for column, fmt in (("email", "user{}@example.com"),
+                        ("session_id", "session-{}"),
+                        ("reset_token", "token-{}")):
+        samples = []
+        for _ in range(lookups):
+            value = fmt.format(random.randrange(count))
+            start = time.perf_counter()
+            db.find_user_by(**{column: value})
+            samples.append((time.perf_counter() - start) * 1e6)
+        samples.sort()
+        print("{:<12} p50={:8.1f}us p99={:8.1f}us".format(
+            column, percentile(samples, 0.5), percentile(samples, 0.99)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" Startup test: runs `python3 app.py` the documented way, in a
+temporary directory with its default settings and the hashing workers
+on, then signs a user up and logs it in. Fails if the server exits or
+does not answer within the timeout.
+  python3 startup_test.py [--timeout 30]
+"""
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from urllib import error, parse, request
+import argparse
+import os
+import signal
+import subprocess
+import sys
+
+BASE_URL = "http://127.0.0.1:5000"
+
+
+def call(path: str, data: dict = None) -> int:
+    """ Sends one request to the server, returns its status code
+    """
+    body = parse.urlencode(data).encode() if data is not None else None
+    try:
+        with request.urlopen(BASE_URL + path, data=body, timeout=10) as resp:
+            return resp.status
+    except error.HTTPError as e:
+        return e.code
+
+
+def wait_ready(server: subprocess.Popen, timeout: float) -> None:
+    """ Waits until the server answers GET /
+    Raises: RuntimeError if it exits or times out first
+    """
+    deadline = monotonic() + timeout
+    while monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("app.py exited with status {}".format(
+                server.returncode))
+        try:
+            if call("/") == 200:
+                return
+        except OSError:
+            pass
+        sleep(0.2)
+    raise RuntimeError("app.py did not answer within {}s".format(timeout))
+
+
+def main() -> int:
+    """ Starts app.py, checks its answers, stops it
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "app.py")
+    env = dict(os.environ)
+    for name in ("DB_URL", "DB_BOOTSTRAP", "HASH_WORKERS"):
+        env.pop(name, None)
+    with TemporaryDirectory() as workdir, \
+            open(os.path.join(workdir, "app.log"), "w+") as log:
+        server = subprocess.Popen([sys.executable, app_path], cwd=workdir,
+                                  env=env, stdout=log, stderr=log)
+        try:
+            wait_ready(server, args.timeout)
+            form = {"email": "startup@example.com", "password": "pwd"}
+            statuses = (call("/users", form), call("/sessions", form))
+        except RuntimeError as e:
+            statuses = str(e)
+        finally:
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(args.timeout)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+        log.seek(0)
+        output = log.read()
+    if statuses != (200, 200):
+        print("{}\n{}".format(output, statuses), file=sys.stderr)
+        return 1
+    print("app.py served POST /users and POST /sessions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+#!/usr/bin/env python3
+""" Benchmark suite of the session authentication API (0x02) and of the
+user authentication service (0x03). Run with: python3 -m benchmarks
+"""
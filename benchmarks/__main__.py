@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+""" Command line of the benchmark suite:
+  python3 -m benchmarks run [options] [-o run.json]
+  python3 -m benchmarks compare base.json new.json [--threshold 10]
+"""
+from datetime import datetime
+from importlib import import_module
+from typing import Dict, List
+import argparse
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from benchmarks.harness import (PROJECTS, REPO_ROOT, child_env, drive,
+                                rss_mb, run_child)
+
+
+SEED_VERSION = 2
+HIGHER_IS_BETTER = ('ops_per_sec',)
+LOWER_IS_BETTER = ('p50_us', 'p99_us', 'rss_mb')
+
+
+def seeded_dir(project: str, params: dict, root: str) -> str:
+    """ Directory holding the seeded population of project, created
+    once per (users, sessions) and reused by later runs
+    """
+    seed_dir = os.path.join(root, "{}-{}-{}-v{}".format(
+        project, params['users'], params['sessions'], SEED_VERSION))
+    marker = os.path.join(seed_dir, ".seeded")
+    if not os.path.exists(marker):
+        shutil.rmtree(seed_dir, ignore_errors=True)
+        os.makedirs(seed_dir)
+        run_child(project, 'seed', params, seed_dir)
+        open(marker, 'w').close()
+    return seed_dir
+
+
+def run_server(project: str, module, params: dict, workdir: str) -> dict:
+    """ Serves the project app from params['workers'] pre-forked
+    processes and replays params['requests'] requests against it
+    """
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.worker', project, 'serve',
+         json.dumps(params)],
+        cwd=workdir, env=child_env(project, module.SERVER_ENV),
+        stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        server = json.loads(proc.stdout.readline())
+        result = drive(server['port'],
+                       module.server_requests(params, params['requests']),
+                       params['concurrency'])
+        result['rss_mb'] = round(sum(rss_mb(pid) for pid in server['pids']),
+                                 1)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait()
+    result['workers'] = params['workers']
+    result['concurrency'] = params['concurrency']
+    return result
+
+
+def run_scenario(project: str, module, name: str, params: dict,
+                 seed_dir: str, root: str) -> dict:
+    """ Runs one scenario in a scratch copy of the seeded population
+    """
+    with tempfile.TemporaryDirectory(dir=root) as scratch:
+        workdir = os.path.join(scratch, 'data')
+        shutil.copytree(seed_dir, workdir)
+        if name == 'server':
+            return run_server(project, module, params, workdir)
+        return run_child(project, 'scenario:' + name, params, workdir,
+                         module.SCENARIOS[name].env)
+
+
+def run(args) -> dict:
+    """ Runs the selected scenarios of the selected projects
+    """
+    params = {'users': args.users, 'sessions': args.sessions,
+              'seed': args.seed, 'iterations': args.iterations,
+              'workers': args.workers, 'concurrency': args.concurrency,
+              'requests': args.requests}
+    selected = set(args.scenarios.split(',')) if args.scenarios else None
+    results = {}
+    for project in args.projects.split(','):
+        module = import_module('benchmarks.{}'.format(project))
+        seed_dir = seeded_dir(project, params, args.workdir)
+        names = list(module.SCENARIOS)
+        if args.server:
+            names.append('server')
+        for name in names:
+            key = "{}.{}".format(project, name)
+            if selected and name not in selected and key not in selected:
+                continue
+            try:
+                results[key] = run_scenario(project, module, name, params,
+                                            seed_dir, args.workdir)
+            except Exception as e:
+                results[key] = {'error': str(e)}
+                print("{:<50} failed: {}".format(key, e), file=sys.stderr)
+                continue
+            print("{:<50} {:>12.1f} ops/s  p50 {:>10.1f}us  p99 {:>10.1f}us"
+                  "  rss {:>8.1f}MB".format(
+                      key, results[key]['ops_per_sec'],
+                      results[key]['p50_us'], results[key]['p99_us'],
+                      results[key]['rss_mb']), file=sys.stderr)
+    return {'meta': metadata(params), 'results': results}
+
+
+def metadata(params: dict) -> dict:
+    """ What a run needs to be reproduced and compared
+    """
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {'params': params, 'commit': commit,
+            'date': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def compare(base: dict, new: dict, threshold: float) -> dict:
+    """ Relative change of every metric of the scenarios of both runs,
+    and the changes worse than threshold percent
+    """
+    scenarios: Dict[str, dict] = {}
+    regressions: List[str] = []
+    for key in sorted(set(base['results']) & set(new['results'])):
+        changes = {}
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            before = base['results'][key].get(metric)
+            after = new['results'][key].get(metric)
+            if not before or after is None:
+                continue
+            change = round((after - before) / before * 100, 1)
+            changes[metric] = {'base': before, 'new': after,
+                               'change_pct': change}
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > threshold:
+                regressions.append("{} {}".format(key, metric))
+        scenarios[key] = changes
+    return {'base': base.get('meta'), 'new': new.get('meta'),
+            'threshold_pct': threshold, 'scenarios': scenarios,
+            'regressions': regressions}
+
+
+def main() -> int:
+    """ Parses the command line
+    """
+    parser = argparse.ArgumentParser(prog='python3 -m benchmarks',
+                                     description=__doc__)
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser('run', help='run scenarios')
+    run_parser.add_argument('--projects', default=','.join(PROJECTS),
+                            help='comma separated, among: {}'.format(
+                                ', '.join(PROJECTS)))
+    run_parser.add_argument('--scenarios', default='',
+                            help='comma separated names (default: all)')
+    run_parser.add_argument('--users', type=int, default=10000)
+    run_parser.add_argument('--sessions', type=int, default=10000)
+    run_parser.add_argument('--seed', type=int, default=0,
+                            help='seed of the random lookups')
+    run_parser.add_argument('--iterations', type=int, default=0,
+                            help='override the iterations of scenarios')
+    run_parser.add_argument('--server', action='store_true',
+                            help='also load a pre-forked HTTP server')
+    run_parser.add_argument('--workers', type=int, default=4)
+    run_parser.add_argument('--concurrency', type=int, default=8)
+    run_parser.add_argument('--requests', type=int, default=2000)
+    run_parser.add_argument('--workdir', default=os.path.join(
+        tempfile.gettempdir(), 'benchmarks'),
+        help='where seeded populations are kept')
+    run_parser.add_argument('-o', '--output', help='JSON report file')
+    compare_parser = commands.add_parser('compare', help='diff two runs')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=10,
+                                help='regression threshold in percent')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        os.makedirs(args.workdir, exist_ok=True)
+        report = run(args)
+        status = 1 if any('error' in result for result
+                          in report['results'].values()) else 0
+    elif args.command == 'compare':
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        report = compare(base, new, args.threshold)
+        status = 1 if report['regressions'] else 0
+    else:
+        parser.print_help()
+        return 2
+    output = json.dumps(report, indent=2)
+    if getattr(args, 'output', None):
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
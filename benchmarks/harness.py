@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+""" Measurement helpers shared by the scenarios: latency sampling,
+memory usage, isolated child processes and a pre-forked HTTP server
+"""
+from http.client import HTTPConnection
+from multiprocessing import Pool
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import resource
+import signal
+import socket
+import subprocess
+import sys
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECTS = {
+    'session_auth': '0x02-Session_authentication',
+    'user_auth_service': '0x03-user_authentication_service',
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """ Returns the pct percentile of sorted samples
+    """
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """ Resident set size of pid (this process by default) in MiB
+    """
+    with open("/proc/{}/statm".format(pid or "self")) as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def peak_rss_mb() -> float:
+    """ Peak resident set size of this process in MiB
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(samples: List[float], elapsed: float) -> Dict[str, float]:
+    """ Throughput and latency percentiles of samples in seconds
+    """
+    samples = sorted(samples)
+    return {'iterations': len(samples),
+            'ops_per_sec': round(len(samples) / elapsed, 2)
+            if elapsed else 0.0,
+            'p50_us': round(percentile(samples, 0.5) * 1e6, 2),
+            'p99_us': round(percentile(samples, 0.99) * 1e6, 2)}
+
+
+def measure(op: Callable[[int], object], iterations: int,
+            warmup: int = 0) -> Dict[str, float]:
+    """ Calls op(i) warmup times, then times iterations calls; the warmup
+    replays the first timed calls, so it is capped to iterations
+    Returns: throughput, p50/p99 latency and memory of this process
+    """
+    for i in range(min(warmup, iterations)):
+        op(i)
+    samples = []
+    start = perf_counter()
+    for i in range(iterations):
+        t = perf_counter()
+        op(i)
+        samples.append(perf_counter() - t)
+    result = summarize(samples, perf_counter() - start)
+    result['rss_mb'] = round(rss_mb(), 1)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def child_env(project: str, extra: Optional[Dict[str, str]] = None
+              ) -> Dict[str, str]:
+    """ Environment of a child running project code
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.join(REPO_ROOT, PROJECTS[project]), REPO_ROOT])
+    env.update(extra or {})
+    return env
+
+
+def run_child(project: str, command: str, args: dict, workdir: str,
+              env: Optional[Dict[str, str]] = None) -> dict:
+    """ Runs benchmarks.worker command in a fresh interpreter inside
+    workdir, so each scenario starts from the same state and reports
+    its own memory
+    Returns: the JSON document printed on the last line of its output
+    """
+    proc = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.worker', project, command,
+         json.dumps(args)],
+        cwd=workdir, env=child_env(project, env), stdout=subprocess.PIPE,
+        universal_newlines=True)
+    if proc.returncode != 0:
+        raise RuntimeError("{} {} failed with status {}".format(
+            project, command, proc.returncode))
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def serve_forked(app, workers: int, after_fork: Callable[[], None]
+                 ) -> Tuple[int, List[int]]:
+    """ Binds an ephemeral port and forks workers serving app on it
+    Returns: the port and the worker pids
+    """
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1024)
+    port = sock.getsockname()[1]
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+            after_fork()
+            server = make_server('127.0.0.1', port, app, fd=sock.fileno())
+            server.serve_forever()
+            os._exit(0)
+        pids.append(pid)
+    sock.close()
+    return port, pids
+
+
+def _client(job: Tuple[int, List[Tuple[str, str, dict]]]) -> List[float]:
+    """ Sends the requests of one client, one connection each
+    Returns: the latency of every request in seconds
+    """
+    port, requests = job
+    samples = []
+    for method, url, headers in requests:
+        t = perf_counter()
+        conn = HTTPConnection('127.0.0.1', port)
+        conn.request(method, url, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        samples.append(perf_counter() - t)
+        if response.status >= 500:
+            raise RuntimeError("{} {}: {}".format(method, url,
+                                                  response.status))
+    return samples
+
+
+def drive(port: int, requests: List[Tuple[str, str, dict]],
+          concurrency: int) -> Dict[str, float]:
+    """ Replays requests against port from concurrency client processes
+    Returns: throughput and p50/p99 latency over all requests
+    """
+    jobs = [(port, requests[i::concurrency]) for i in range(concurrency)]
+    with Pool(concurrency) as pool:
+        start = perf_counter()
+        results = pool.map(_client, jobs)
+        elapsed = perf_counter() - start
+    return summarize([s for samples in results for s in samples], elapsed)
+
+
+class Scenario():
+    """ One benchmark: func(params, iterations) run in a child process
+    whose environment is extended with env
+    """
+
+    def __init__(self, func: Callable[[dict, int], dict],
+                 iterations: int = 1000, env: Optional[dict] = None):
+        """ Initialization
+        """
+        self.func = func
+        self.iterations = iterations
+        self.env = env or {}
+
+    def run(self, params: dict) -> dict:
+        """ Runs the scenario, params['iterations'] overriding the default
+        """
+        return self.func(params, params.get('iterations') or self.iterations)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+""" Scenarios of the session authentication API (0x02): model store,
+BasicAuth, SessionDBAuth and the Flask app
+"""
+from base64 import b64encode
+from datetime import datetime
+from hashlib import sha256
+from typing import Callable, Iterable, List, Tuple
+import json
+import os
+import random
+import subprocess
+import sys
+from benchmarks.harness import Scenario, measure
+
+
+PASSWORD = "benchmark"
+SESSION_NAME = "_my_session_id"
+
+
+def user_id(i: int) -> str:
+    """ Deterministic uuid4-shaped id of the i-th seeded user
+    """
+    return "00000000-0000-4000-8000-{:012x}".format(i)
+
+
+def email(i: int) -> str:
+    """ Email of the i-th seeded user
+    """
+    return "user{}@example.com".format(i)
+
+
+def session_id(i: int) -> str:
+    """ Session id of the i-th seeded session
+    """
+    return "00000000-0000-4000-9000-{:012x}".format(i)
+
+
+def basic_header(i: int) -> str:
+    """ Authorization header of the i-th seeded user
+    """
+    credentials = "{}:{}".format(email(i), PASSWORD).encode()
+    return "Basic " + b64encode(credentials).decode()
+
+
+def targets(params: dict, count: int, population: int) -> List[int]:
+    """ count indexes drawn from population with the run's seed
+    """
+    rng = random.Random(params['seed'])
+    return [rng.randrange(population) for _ in range(count)]
+
+
+def write_snapshot(file_path: str, objs: Iterable[Tuple[str, dict]]) -> None:
+    """ Streams objs to a snapshot file in the format of save_to_file
+    """
+    with open(file_path, 'w') as f:
+        f.write("{")
+        separator = "\n"
+        for obj_id, obj_json in objs:
+            f.write("{}{}: {}".format(separator, json.dumps(obj_id),
+                                      json.dumps(obj_json)))
+            separator = ",\n"
+        f.write("\n}\n")
+
+
+def seed(params: dict) -> dict:
+    """ Writes the User and UserSession snapshots of the population, in
+    JSON and in the binary format
+    """
+    from models.base import TIMESTAMP_FORMAT
+    from models.user import User
+    from models.user_session import UserSession
+    now = datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+    users, sessions = params['users'], params['sessions']
+    pwd_hash = sha256(PASSWORD.encode()).hexdigest()
+    write_snapshot(".db_User.json", (
+        (user_id(i), {'id': user_id(i), 'created_at': now,
+                      'updated_at': now, 'email': email(i),
+                      '_password': pwd_hash, 'first_name': "First{}".format(
+                          i % 1000), 'last_name': "Last{}".format(i)})
+        for i in range(users)))
+    write_snapshot(".db_UserSession.json", (
+        (session_id(i), {'id': session_id(i), 'created_at': now,
+                         'updated_at': now, 'user_id': user_id(i % users),
+                         'session_id': session_id(i)})
+        for i in range(sessions)))
+    os.environ['STORE_FORMAT'] = 'binary'
+    for model in (User, UserSession):
+        model.load_from_file()
+        model.save_to_file()
+    return {'users': users, 'sessions': sessions}
+
+
+def load_from_file(params: dict, iterations: int) -> dict:
+    """ Startup cost: User.load_from_file
+    """
+    from models.user import User
+    return measure(lambda i: User.load_from_file(), iterations)
+
+
+def app_startup(params: dict, iterations: int) -> dict:
+    """ Readiness: a new interpreter importing the Flask app, which
+    loads the users
+    """
+    return measure(lambda i: subprocess.run(
+        [sys.executable, '-c', 'import api.v1.app'], check=True), iterations)
+
+
+def search_email(params: dict, iterations: int) -> dict:
+    """ Base.search on the email index
+    """
+    from models.user import User
+    User.load_from_file()
+    picks = targets(params, iterations, params['users'])
+    return measure(lambda i: User.search({'email': email(picks[i])}),
+                   iterations, warmup=10)
+
+
+def search_scan(params: dict, iterations: int) -> dict:
+    """ Base.search on an attribute without index: full scan
+    """
+    from models.user import User
+    User.load_from_file()
+    return measure(lambda i: User.search({'_password': "missing"}),
+                   iterations)
+
+
+def save_to_file(params: dict, iterations: int) -> dict:
+    """ Base.save_to_file of every user
+    """
+    from models.user import User
+    User.load_from_file()
+    return measure(lambda i: User.save_to_file(), iterations)
+
+
+class FakeRequest():
+    """ The parts of a Flask request read by the authenticators
+    """
+
+    def __init__(self, headers: dict = None, cookies: dict = None):
+        """ Initialization
+        """
+        self.headers = headers or {}
+        self.cookies = cookies or {}
+
+
+def basic_auth_current_user(distinct: int) -> Callable[[dict, int], dict]:
+    """ BasicAuth.current_user with credentials of distinct users
+    (0: a new user for each call)
+    """
+    def scenario(params: dict, iterations: int) -> dict:
+        from api.v1.auth.basic_auth import BasicAuth
+        from models.user import User
+        User.load_from_file()
+        auth = BasicAuth()
+        picks = targets(params, distinct or iterations, params['users'])
+        requests = [FakeRequest({'Authorization': basic_header(i)})
+                    for i in picks]
+        return measure(
+            lambda i: auth.current_user(requests[i % len(requests)]),
+            iterations)
+    return scenario
+
+
+def session_db_user_id(params: dict, iterations: int) -> dict:
+    """ SessionDBAuth.user_id_for_session_id of seeded sessions
+    """
+    from api.v1.auth.session_db_auth import SessionDBAuth
+    from models.user_session import UserSession
+    UserSession.load_from_file()
+    auth = SessionDBAuth()
+    auth.reaper.stop()
+    picks = targets(params, iterations, params['sessions'])
+    return measure(
+        lambda i: auth.user_id_for_session_id(session_id(picks[i])),
+        iterations, warmup=10)
+
+
+def http_get(url: Callable[[int], str], headers: Callable[[int], dict],
+             population: str = 'users') -> Callable[[dict, int], dict]:
+    """ GET url(i) with headers(i) through the Flask test client,
+    i drawn among the seeded users (or sessions)
+    """
+    def scenario(params: dict, iterations: int) -> dict:
+        from api.v1.app import app
+        client = app.test_client(use_cookies=False)
+        picks = targets(params, iterations, params[population])
+
+        def op(i):
+            response = client.get(url(picks[i]), headers=headers(picks[i]))
+            if response.status_code != 200:
+                raise RuntimeError("{}: {}".format(url(picks[i]),
+                                                   response.status_code))
+        return measure(op, iterations, warmup=10)
+    return scenario
+
+
+def session_cookie(i: int) -> dict:
+    """ Cookie header of a seeded session
+    """
+    return {'Cookie': "{}={}".format(SESSION_NAME, session_id(i))}
+
+
+BASIC_ENV = {'AUTH_TYPE': 'basic_auth'}
+BINARY_ENV = {'STORE_FORMAT': 'binary'}
+SESSION_ENV = {'AUTH_TYPE': 'session_db_auth', 'SESSION_NAME': SESSION_NAME,
+               'SESSION_DURATION': '86400'}
+SCENARIOS = {
+    'load_from_file': Scenario(load_from_file, 3),
+    'load_from_file_lazy': Scenario(load_from_file, 3,
+                                    {'STORE_LOADING': 'lazy'}),
+    'app_startup': Scenario(app_startup, 3),
+    'app_startup_lazy': Scenario(app_startup, 3, {'STORE_LOADING': 'lazy'}),
+    'load_from_file_binary': Scenario(load_from_file, 3, BINARY_ENV),
+    'app_startup_binary': Scenario(app_startup, 3, BINARY_ENV),
+    'search_email': Scenario(search_email, 10000),
+    'search_email_binary': Scenario(search_email, 10000, BINARY_ENV),
+    'search_scan': Scenario(search_scan, 5),
+    'save_to_file': Scenario(save_to_file, 3),
+    'basic_auth_current_user': Scenario(
+        basic_auth_current_user(0), 5000, {'BASIC_AUTH_CACHE_SIZE': '0'}),
+    'basic_auth_current_user_cached': Scenario(
+        basic_auth_current_user(100), 10000),
+    'session_db_user_id': Scenario(session_db_user_id, 10000,
+                                   {'SESSION_DURATION': '86400'}),
+    'session_db_user_id_binary': Scenario(
+        session_db_user_id, 10000,
+        dict(BINARY_ENV, SESSION_DURATION='86400')),
+    'http_users_me': Scenario(http_get(
+        lambda i: "/api/v1/users/me",
+        lambda i: {'Authorization': basic_header(i)}), 2000, BASIC_ENV),
+    'http_users_me_binary': Scenario(http_get(
+        lambda i: "/api/v1/users/me",
+        lambda i: {'Authorization': basic_header(i)}), 2000,
+        dict(BASIC_ENV, **BINARY_ENV)),
+    'http_users_page': Scenario(http_get(
+        lambda i: "/api/v1/users?limit=100",
+        lambda i: {'Authorization': basic_header(i)}), 500, BASIC_ENV),
+    'http_session_me': Scenario(http_get(
+        lambda i: "/api/v1/users/me",
+        session_cookie, 'sessions'), 2000, SESSION_ENV),
+}
+SERVER_ENV = BASIC_ENV
+
+
+def server_app(params: dict):
+    """ The Flask app served by the pre-forked workers
+    """
+    from api.v1.app import app
+    return app, lambda: None
+
+
+def server_requests(params: dict, count: int) -> List[Tuple[str, str, dict]]:
+    """ Requests replayed against the server: GET /api/v1/users/me with
+    the credentials of seeded users
+    """
+    return [("GET", "/api/v1/users/me", {'Authorization': basic_header(i)})
+            for i in targets(params, count, params['users'])]
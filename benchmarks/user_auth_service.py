@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+""" Scenarios of the user authentication service (0x03): Auth flows on
+a seeded SQLite database and the Flask app
+"""
+from typing import Callable, List, Tuple
+import random
+from benchmarks.harness import Scenario, measure
+
+
+PASSWORD = "benchmark"
+DB_FILE = "benchmark.db"
+ENV = {'DB_URL': "sqlite:///" + DB_FILE, 'DB_BOOTSTRAP': 'none',
+       'HASH_WORKERS': '0'}
+
+
+def email(i: int) -> str:
+    """ Email of the i-th seeded user
+    """
+    return "user{}@example.com".format(i)
+
+
+def session_id(i: int) -> str:
+    """ Session id of the i-th seeded user
+    """
+    return "session-{}".format(i)
+
+
+def targets(params: dict, count: int, population: int) -> List[int]:
+    """ count indexes drawn from population with the run's seed
+    """
+    rng = random.Random(params['seed'])
+    return [rng.randrange(population) for _ in range(count)]
+
+
+def seed(params: dict, chunk: int = 50000) -> dict:
+    """ Creates the database with params['users'] users sharing one
+    password, the first params['sessions'] of them logged in
+    """
+    from db import DB
+    from user import User
+    import bcrypt
+    db = DB("sqlite:///" + DB_FILE, bootstrap="reset")
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt())
+    users, sessions = params['users'], params['sessions']
+    for start in range(0, users, chunk):
+        rows = [{"email": email(i), "hashed_password": hashed,
+                 "session_id": session_id(i) if i < sessions else None,
+                 "reset_token": None}
+                for i in range(start, min(start + chunk, users))]
+        db._session.execute(User.__table__.insert(), rows)
+        db._session.commit()
+    return {'users': users, 'sessions': min(users, sessions)}
+
+
+def auth_flow(call: Callable, population: str = 'users'
+              ) -> Callable[[dict, int], dict]:
+    """ Times call(auth, i) for seeded indexes i
+    """
+    def scenario(params: dict, iterations: int) -> dict:
+        from auth import Auth
+        auth = Auth()
+        picks = targets(params, iterations,
+                        min(params['users'], params[population]))
+        return measure(lambda i: call(auth, picks[i]), iterations, warmup=1)
+    return scenario
+
+
+def http_profile(params: dict, iterations: int) -> dict:
+    """ GET /profile with a seeded session through the Flask test client
+    """
+    from app import app
+    client = app.test_client(use_cookies=False)
+    picks = targets(params, iterations,
+                    min(params['users'], params['sessions']))
+
+    def op(i):
+        response = client.get("/profile", headers={
+            'Cookie': "session_id={}".format(session_id(picks[i]))})
+        if response.status_code != 200:
+            raise RuntimeError("/profile: {}".format(response.status_code))
+    return measure(op, iterations, warmup=10)
+
+
+SCENARIOS = {
+    'valid_login': Scenario(auth_flow(
+        lambda auth, i: auth.valid_login(email(i), PASSWORD)), 20, ENV),
+    'create_session': Scenario(auth_flow(
+        lambda auth, i: auth.create_session(email(i))), 2000, ENV),
+    'get_user_from_session_id': Scenario(auth_flow(
+        lambda auth, i: auth.get_user_from_session_id(session_id(i)),
+        'sessions'), 5000, ENV),
+    'get_reset_password_token': Scenario(auth_flow(
+        lambda auth, i: auth.get_reset_password_token(email(i))), 2000, ENV),
+    'http_profile': Scenario(http_profile, 2000, ENV),
+}
+SERVER_ENV = {'DB_URL': ENV['DB_URL'], 'DB_BOOTSTRAP': 'none'}
+
+
+def server_app(params: dict):
+    """ The Flask app served by the pre-forked workers, each dropping
+    the database connections inherited from the parent
+    """
+    from app import app, get_auth
+    auth = get_auth()
+    return app, lambda: auth._db._engine.dispose(close=False)
+
+
+def server_requests(params: dict, count: int) -> List[Tuple[str, str, dict]]:
+    """ Requests replayed against the server: GET /profile with the
+    session of seeded users
+    """
+    population = min(params['users'], params['sessions'])
+    return [("GET", "/profile",
+             {'Cookie': "session_id={}".format(session_id(i))})
+            for i in targets(params, count, population)]
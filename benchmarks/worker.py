@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+""" Child process entry point, run inside the seeded working directory
+with the project on PYTHONPATH:
+  python3 -m benchmarks.worker <project> seed <params>
+  python3 -m benchmarks.worker <project> scenario:<name> <params>
+  python3 -m benchmarks.worker <project> serve <params>
+"""
+from importlib import import_module
+import json
+import os
+import signal
+import sys
+from benchmarks.harness import serve_forked
+
+
+def serve(module, params: dict) -> None:
+    """ Forks the workers, reports their port and pids on stdout, then
+    waits until terminated
+    """
+    app, after_fork = module.server_app(params)
+    port, pids = serve_forked(app, params['workers'], after_fork)
+
+    def stop(*_):
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, stop)
+    print(json.dumps({'port': port, 'pids': pids}), flush=True)
+    while True:
+        signal.pause()
+
+
+def main(project: str, command: str, params: dict) -> None:
+    """ Runs command of the benchmarks.<project> module
+    """
+    module = import_module('benchmarks.{}'.format(project))
+    if command == 'seed':
+        print(json.dumps(module.seed(params)))
+    elif command.startswith('scenario:'):
+        scenario = module.SCENARIOS[command.split(':', 1)[1]]
+        print(json.dumps(scenario.run(params)))
+    elif command == 'serve':
+        serve(module, params)
+    else:
+        raise ValueError("unknown command {}".format(command))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], sys.argv[2], json.loads(sys.argv[3]))